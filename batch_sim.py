@@ -0,0 +1,221 @@
+"""Run many independent games across every CPU core and summarize them.
+
+Each game plays one life with its own seed under a scripted policy, with no
+rendering, until the player dies or --max-frames runs out:
+
+    python batch_sim.py --games 5000 --policy autoplay
+    python batch_sim.py --games 5000 --set 'ENEMY_SPAWN_FRAMES=(50, 100)' --set dash_time_max=40
+    python batch_sim.py --policy my_bots:cautious_policy --json results.json
+
+--set overrides a module constant of pygame_first_game (spawn ranges,
+SCROLL_SPEED, ...) or, failing that, an attribute of the Player.
+"""
+import os
+
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+os.environ.setdefault('PYGAME_HIDE_SUPPORT_PROMPT', '1')
+
+import argparse
+import ast
+import importlib
+import json
+import statistics
+import sys
+import time
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+
+import pygame_first_game as game_module
+from pygame_first_game import FPS, POLICIES, Game, Player
+
+# Set in each worker by init_worker()
+_policy = None
+_player_overrides = {}
+
+
+def load_policy(spec):
+    """A policy from POLICIES by name, or any function given as 'module:function'"""
+    if spec in POLICIES:
+        return POLICIES[spec]
+    module_name, _, function_name = spec.partition(':')
+    if not function_name:
+        raise ValueError(f"unknown policy {spec!r}; use one of {', '.join(POLICIES)} or module:function")
+    return getattr(importlib.import_module(module_name), function_name)
+
+
+def parse_overrides(assignments):
+    """Split NAME=VALUE strings into module constants and Player attributes.
+
+    Raises ValueError for a malformed assignment, a value that isn't a Python
+    literal, or a name that is neither a module constant nor a settable
+    Player attribute.
+    """
+    module_overrides = {}
+    player_overrides = {}
+    player = Player()
+    for assignment in assignments:
+        name, equals, text = assignment.partition('=')
+        if not equals or not name:
+            raise ValueError(f"expected NAME=VALUE, got {assignment!r}")
+        try:
+            value = ast.literal_eval(text)
+        except (ValueError, SyntaxError):
+            raise ValueError(f"{name}: {text!r} is not a Python literal (quote strings)")
+        if name.isupper() and hasattr(game_module, name):
+            module_overrides[name] = value
+        elif not hasattr(player, name):
+            raise ValueError(f"neither pygame_first_game nor Player has {name!r}")
+        elif isinstance(getattr(Player, name, None), property):
+            raise ValueError(f"Player.{name} is read-only; set the attribute it is derived from")
+        else:
+            player_overrides[name] = value
+    return module_overrides, player_overrides
+
+
+def init_worker(policy_spec, module_overrides, player_overrides):
+    global _policy, _player_overrides
+    _policy = load_policy(policy_spec)
+    for name, value in module_overrides.items():
+        setattr(game_module, name, value)
+    _player_overrides = player_overrides
+
+
+def play(seed, max_frames):
+    """Play one life and return what happened in it"""
+    game = Game(seed=seed)
+    player = game.player
+    for name, value in _player_overrides.items():
+        setattr(player, name, value)
+
+    while not game.game_over and game.frame < max_frames:
+        for key in _policy(game):
+            game.handle_key(key)
+        game.step()
+
+    return {
+        'seed': seed,
+        'frames': game.frame,
+        'distance': game.distance // 10,
+        'score': player.score,
+        'death_cause': game.death_cause or 'survived',
+        **game.counts,
+    }
+
+
+def play_batch(seeds, max_frames):
+    return [play(seed, max_frames) for seed in seeds]
+
+
+def percentile(values, p):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * p / 100))]
+
+
+def summarize(results):
+    """Aggregate per-game results into summary statistics"""
+    games = len(results)
+    distances = [result['distance'] for result in results]
+    scores = [result['score'] for result in results]
+    total_km = max(sum(distances), 1) / 1000
+    causes = Counter(result['death_cause'] for result in results)
+
+    return {
+        'games': games,
+        'distance_m': {
+            'mean': statistics.fmean(distances),
+            'median': statistics.median(distances),
+            'stdev': statistics.pstdev(distances),
+            'p10': percentile(distances, 10),
+            'p90': percentile(distances, 90),
+            'max': max(distances),
+        },
+        'score': {
+            'mean': statistics.fmean(scores),
+            'median': statistics.median(scores),
+            'max': max(scores),
+        },
+        'death_causes': {cause: count / games for cause, count in causes.most_common()},
+        # Per kilometre run, so the rates don't depend on how long games last
+        'per_km': {kind: sum(result[kind] for result in results) / total_km
+                   for kind in ('stomps', 'coins', 'powerups', 'dash_powerups')},
+        'games_with_pickup': {kind: sum(1 for result in results if result[kind]) / games
+                              for kind in ('powerups', 'dash_powerups')},
+    }
+
+
+def print_summary(summary):
+    distance = summary['distance_m']
+    score = summary['score']
+    print(f"Games: {summary['games']}")
+    print(f"Distance (m): mean {distance['mean']:.0f}  median {distance['median']:.0f}  "
+          f"stdev {distance['stdev']:.0f}  p10 {distance['p10']}  p90 {distance['p90']}  max {distance['max']}")
+    print(f"Score: mean {score['mean']:.0f}  median {score['median']:.0f}  max {score['max']}")
+    print("Death causes: " + "  ".join(f"{cause} {share:.1%}" for cause, share in summary['death_causes'].items()))
+    print("Per km: " + "  ".join(f"{kind} {rate:.2f}" for kind, rate in summary['per_km'].items()))
+    print("Games with a pickup: " + "  ".join(f"{kind} {share:.1%}"
+                                            for kind, share in summary['games_with_pickup'].items()))
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Infinite Runner batch simulations")
+    parser.add_argument('--games', type=int, default=1000,
+                        help="independent games to play (default: %(default)s)")
+    parser.add_argument('--seed', type=int, default=0,
+                        help="seed of the first game; game i uses seed + i (default: %(default)s)")
+    parser.add_argument('--policy', default='autoplay',
+                        help=f"{' or '.join(POLICIES)}, or module:function (default: %(default)s)")
+    parser.add_argument('--max-frames', type=int, default=FPS * 60 * 10,
+                        help="frames before a game counts as survived (default: 10 minutes)")
+    parser.add_argument('--set', dest='overrides', action='append', default=[], metavar='NAME=VALUE',
+                        help="override a module constant or Player attribute; repeatable")
+    parser.add_argument('--workers', type=int, default=None,
+                        help="worker processes (default: one per CPU)")
+    parser.add_argument('--json', metavar='PATH',
+                        help="write the summary and every game's result as JSON")
+    args = parser.parse_args(argv)
+    if args.games < 1:
+        parser.error("--games must be at least 1")
+    if args.workers is not None and args.workers < 1:
+        parser.error("--workers must be at least 1")
+    # Fail here rather than in every worker
+    try:
+        load_policy(args.policy)
+        args.module_overrides, args.player_overrides = parse_overrides(args.overrides)
+    except (ValueError, ImportError, AttributeError) as error:
+        parser.error(str(error))
+    return args
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    module_overrides, player_overrides = args.module_overrides, args.player_overrides
+
+    workers = args.workers or os.cpu_count() or 1
+    seeds = range(args.seed, args.seed + args.games)
+    # A few chunks per worker keeps every core busy without a round trip per game
+    chunk_size = max(1, args.games // (workers * 8))
+    chunks = [seeds[i:i + chunk_size] for i in range(0, args.games, chunk_size)]
+
+    start = time.perf_counter()
+    results = []
+    with ProcessPoolExecutor(workers, initializer=init_worker,
+                             initargs=(args.policy, module_overrides, player_overrides)) as executor:
+        for batch in executor.map(play_batch, chunks, [args.max_frames] * len(chunks)):
+            results.extend(batch)
+    elapsed = time.perf_counter() - start
+
+    summary = summarize(results)
+    print_summary(summary)
+    frames = sum(result['frames'] for result in results)
+    print(f"Simulated {frames} frames on {workers} workers in {elapsed:.1f}s "
+          f"({frames / max(elapsed, 1e-9):.0f} frames/s)")
+
+    if args.json:
+        summary.update(policy=args.policy, overrides=args.overrides, max_frames=args.max_frames)
+        with open(args.json, 'w') as f:
+            json.dump({'summary': summary, 'games': results}, f, indent=2)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,245 @@
+"""Rendering and simulation benchmarks for the Infinite Runner.
+
+Runs named scenarios under the SDL dummy video driver with fixed seeds,
+each held inside the stretch of the run it is named after, records
+per-phase timings with the game's FrameProfiler, writes them as JSON and
+compares them against a stored baseline:
+
+    python benchmark.py                    # run, compare, exit 1 on regressions
+    python benchmark.py --update-baseline  # run and store as the new baseline
+"""
+import os
+
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+
+import argparse
+import bisect
+import json
+import platform
+import statistics
+import sys
+
+import pygame
+
+from pygame_first_game import (BACKENDS, Enemy, FrameProfiler, Game, GROUND_Y, Player,
+                               SUNSET_END, SUNSET_START, autoplay_policy, create_backend, draw_hud,
+                               entity_left, load_fonts, parse_size)
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_BASELINE = os.path.join(HERE, 'benchmark_baseline.json')
+DEFAULT_OUTPUT = os.path.join(HERE, 'benchmark_results.json')
+
+# Phases compared against the baseline; every recorded phase is still written out
+TRACKED_PHASES = [
+    'draw_gradient_sky',
+    'draw_boston_skyline',
+    'Player.draw',
+    'entity updates',
+    'collisions',
+    'particles',
+    'draw_particles',
+    'work_ms',
+]
+
+# Totals of the per-kind laps Game.update_entities records
+PHASE_TOTALS = {
+    'entity updates': ('enemies update', 'coins update', 'powerups update', 'dash_powerups update'),
+    'collisions': ('enemies collisions', 'coins collisions', 'powerups collisions',
+                   'dash_powerups collisions'),
+}
+
+WARMUP_FRAMES = 60  # Frames run before timing starts, so atlases and sky caches are built
+
+# Distance bands of the sky; scenarios wrap back to the start of theirs so every
+# frame is drawn in the stretch they are named after (None: no end)
+DAY = (0, SUNSET_START)
+SUNSET = (SUNSET_START, SUNSET_END)
+SKYLINE_SLIDE_IN = (15000, 17000)
+FULL_SKYLINE = (17500, None)
+
+
+def keep_in_band(game, band):
+    start, end = band
+    if end is not None and game.distance >= end:
+        game.distance = start + (game.distance - start) % (end - start)
+        game.previous = game.view()
+
+
+def keep_dashing(game):
+    player = game.player
+    player.dash_cooldown_max = 0
+    if not player.dash_active:
+        player.activate_dash()
+    player.start_dash()
+
+
+def chain_stomps(game):
+    """Keep an enemy under the falling player so every landing is a stomp"""
+    player = game.player
+    if player.on_ground:
+        player.jump()
+    elif player.vel_y > 0:
+        player_x = game.camera_x + player.x
+        if not any(enemy.alive and abs(enemy.x - player_x) < player.width for enemy in game.enemies):
+            enemy = Enemy(player_x, game.rng)
+            enemy.y = GROUND_Y - enemy.height
+            bisect.insort(game.enemies, enemy, key=entity_left)
+
+
+def particle_storm(game):
+    """Stomp on every landing and pick up a coin every frame, keeping hundreds of
+    burst particles alive alongside the jump rings"""
+    chain_stomps(game)
+    player = game.player
+    coin = game.coin_pool.acquire(game.camera_x + player.x + player.width / 2 - 10, player.y + 15)
+    bisect.insort(game.coins, coin, key=entity_left)
+
+
+# name -> (distance band, per-frame hook); all scenarios also run the autoplay policy
+SCENARIOS = {
+    'early_run': (DAY, None),
+    'sunset_transition': (SUNSET, None),
+    'skyline_slide_in': (SKYLINE_SLIDE_IN, None),
+    'full_skyline': (FULL_SKYLINE, None),
+    'sustained_dash': (DAY, keep_dashing),
+    'particle_storm': (DAY, particle_storm),
+}
+
+
+def run_scenario(screen, fonts, name, frames, seed):
+    """Run one scenario and return the median milliseconds of each phase, its peak
+    particle count and how the player's rotated sprite cache fared"""
+    band, hook = SCENARIOS[name]
+    # Every scenario starts with a cold sprite cache so its counters are its own
+    Player.sprite_cache.clear()
+    profiler = FrameProfiler(record=True)
+    game = Game(profiler, seed)
+    game.distance = band[0]
+    game.previous = game.view()
+    peak_particles = 0
+
+    for frame in range(WARMUP_FRAMES + frames):
+        if frame == WARMUP_FRAMES:
+            profiler.samples.clear()
+        profiler.begin_frame()
+
+        for key in autoplay_policy(game):
+            game.handle_key(key)
+        if hook is not None:
+            hook(game)
+        game.step()
+        keep_in_band(game, band)
+        # Benchmarks measure cost, not play; keep the run going through deaths
+        game.game_over = False
+        if frame >= WARMUP_FRAMES:
+            peak_particles = max(peak_particles, len(game.particles))
+
+        game.draw(screen)
+        draw_hud(screen, game, *fonts)
+        profiler.lap('hud')
+        profiler.end_frame(game.distance)
+
+    for sample in profiler.samples:
+        for total, parts in PHASE_TOTALS.items():
+            sample[total] = sum(sample.get(part, 0.0) for part in parts)
+    phases = profiler.phases + list(PHASE_TOTALS) + ['work_ms']
+    results = {phase: statistics.median(sample.get(phase, 0.0) for sample in profiler.samples)
+               for phase in phases}
+    results['peak_particles'] = peak_particles
+    results['sprite_cache_hits'] = Player.sprite_cache.hits
+    results['sprite_cache_misses'] = Player.sprite_cache.misses
+    results['sprite_cache_hit_rate'] = Player.sprite_cache.hit_rate()
+    return results
+
+
+def compare(results, baseline, tolerance, floor_ms):
+    """Tracked phases that got slower than baseline by more than tolerance and floor_ms"""
+    regressions = []
+    for scenario, phases in results['scenarios'].items():
+        baseline_phases = baseline.get('scenarios', {}).get(scenario, {})
+        for phase in TRACKED_PHASES:
+            if phase not in phases or phase not in baseline_phases:
+                continue
+            before, after = baseline_phases[phase], phases[phase]
+            if after > before * (1 + tolerance) and after - before > floor_ms:
+                regressions.append((scenario, phase, before, after))
+    return regressions
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Infinite Runner benchmarks")
+    parser.add_argument('scenarios', nargs='*', metavar='SCENARIO',
+                        help=f"scenarios to run (default: all of {', '.join(SCENARIOS)})")
+    parser.add_argument('--frames', type=int, default=600,
+                        help="timed frames per scenario (default: %(default)s)")
+    parser.add_argument('--seed', type=int, default=1,
+                        help="random seed for every scenario (default: %(default)s)")
+    parser.add_argument('--backend', choices=BACKENDS, default='surface',
+                        help="render backend to draw with (default: %(default)s)")
+    parser.add_argument('--render-size', type=parse_size, metavar='WxH',
+                        help="internal resolution frames are drawn at (default: the window size)")
+    parser.add_argument('--output', default=DEFAULT_OUTPUT,
+                        help="where to write the results JSON (default: %(default)s)")
+    parser.add_argument('--baseline', default=DEFAULT_BASELINE,
+                        help="baseline JSON to compare against (default: %(default)s)")
+    parser.add_argument('--update-baseline', action='store_true',
+                        help="write the results to the baseline instead of comparing")
+    parser.add_argument('--tolerance', type=float, default=0.25,
+                        help="allowed slowdown as a fraction of the baseline (default: %(default)s)")
+    parser.add_argument('--floor-ms', type=float, default=0.05,
+                        help="slowdowns smaller than this many ms never fail (default: %(default)s)")
+    args = parser.parse_args(argv)
+    unknown = sorted(set(args.scenarios) - set(SCENARIOS))
+    if unknown:
+        parser.error(f"unknown scenario(s): {', '.join(unknown)}")
+    return args
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    screen = create_backend(args.backend, "Infinite Runner benchmark", args.render_size)
+    fonts = load_fonts()[:2]
+
+    results = {
+        'frames': args.frames,
+        'seed': args.seed,
+        'python': platform.python_version(),
+        'pygame': pygame.version.ver,
+        'machine': platform.machine(),
+        'backend': args.backend,
+        'render_size': args.render_size,
+        'scenarios': {},
+    }
+    for name in args.scenarios or SCENARIOS:
+        phases = run_scenario(screen, fonts, name, args.frames, args.seed)
+        results['scenarios'][name] = phases
+        print(f"{name:<20}work {phases['work_ms']:6.3f} ms  " +
+              "  ".join(f"{phase} {phases[phase]:.3f}" for phase in TRACKED_PHASES[:-1] if phase in phases) +
+              f"  peak particles {phases['peak_particles']}"
+              f"  sprite cache hits {phases['sprite_cache_hit_rate']:.1%}")
+
+    path = args.baseline if args.update_baseline else args.output
+    with open(path, 'w') as f:
+        json.dump(results, f, indent=2, sort_keys=True)
+    print(f"Wrote {path}")
+    if args.update_baseline:
+        return 0
+
+    if not os.path.exists(args.baseline):
+        print(f"No baseline at {args.baseline}; run with --update-baseline to create one")
+        return 0
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+
+    regressions = compare(results, baseline, args.tolerance, args.floor_ms)
+    for scenario, phase, before, after in regressions:
+        print(f"REGRESSION {scenario}/{phase}: {before:.3f} ms -> {after:.3f} ms "
+              f"(+{(after / before - 1) * 100 if before else float('inf'):.0f}%)")
+    if regressions:
+        return 1
+    print(f"No regressions against {args.baseline}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
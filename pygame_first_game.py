@@ -1,12 +1,49 @@
+import os
+import sys
+import time
+
+_import_started = time.perf_counter()  # Reported by --startup-trace
+# The entity broadphase bisects with key=, new in Python 3.10
+if sys.version_info < (3, 10):
+    sys.exit("Infinite Runner needs Python 3.10 or newer")
+# Importing the module prints nothing; pygame subsystems start when first needed
+os.environ.setdefault('PYGAME_HIDE_SUPPORT_PROMPT', '1')
+
 import pygame
 import random
 import math
-
-pygame.init()
+import argparse
+import bisect
+import csv
+import gc
+import hashlib
+import heapq
+import json
+import multiprocessing
+import queue
+import struct
+import weakref
+import zlib
+from collections import OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor
+from multiprocessing import shared_memory
+
+import numpy as np
+
+try:
+    from pygame._sdl2 import video as sdl2_video
+except ImportError:  # pygame built without the experimental SDL2 renderer bindings
+    sdl2_video = None
+
+_import_finished = time.perf_counter()
 
 # Constants
 WIDTH, HEIGHT = 800, 600
-FPS = 60
+FPS = 60  # Simulation steps per second
+STEP_MS = 1000 / FPS
+MAX_CATCHUP_STEPS = 5  # Past this many steps per rendered frame the game slows down instead
+GC_YOUNG_LIMIT = 20000  # Young objects allowed to pile up before a mid-run collection
+BACKEND_CALIBRATION_FRAMES = 30  # Frames drawn on each backend to pick the faster one
 WHITE = (255, 255, 255)
 BLACK = (0, 0, 0)
 SKY_BLUE = (135, 206, 235)
@@ -25,14 +62,321 @@ JUMP_FORCE = -15
 GROUND_Y = HEIGHT - 100
 SCROLL_SPEED = 6
 
-# Screen setup
-screen = pygame.display.set_mode((WIDTH, HEIGHT))
-pygame.display.set_caption("Infinite Runner")
-clock = pygame.time.Clock()
+# Entities
+ENEMY_WIDTH = 55  # Hitbox width, which level generation also keeps powerups clear of
+
+# Spacing between placements, in frames of scrolling, drawn from these inclusive ranges
+ENEMY_SPAWN_FRAMES = (60, 120)
+COIN_SPAWN_FRAMES = (40, 80)  # Between coin rows
+POWERUP_SPAWN_FRAMES = (300, 500)
+DASH_POWERUP_SPAWN_FRAMES = (350, 550)
+
+# Level generation
+CHUNK_WIDTH = WIDTH  # World pixels per generated chunk
+LOOKAHEAD_CHUNKS = 3  # Chunks queued ahead of the right edge of the screen
+COIN_ROW_LENGTH = (1, 3)  # Coins per row
+COIN_ROW_SPACING = 35
+ITEM_CLEARANCE = 60  # Powerups are kept this far from either side of an enemy
+LEVEL_CACHE_SIZE = 8  # Levels kept for reuse by seed
+
+# Entities this far outside the screen still get drawn (glows and death squash overhang)
+DRAW_MARGIN = 30
+
+# Player sprite cache quantization
+PLAYER_SCALE_STEP = 0.02  # Squash/stretch resolution (under 1px at player size)
+PLAYER_ROTATION_STEP = 5  # Degrees
+PLAYER_SPRITE_CACHE_SIZE = 256
+
+TEXT_CACHE_SIZE = 64  # Distinct HUD strings kept rendered
+
+# Pre-rendered entity animation frames
+ATLAS_MAX_WIDTH = 1024
+CART_WHEEL_STEP = 6  # Degrees; the cart turns its wheels 12 degrees per frame
+
+# Assets
+ASSET_DIR = os.path.dirname(os.path.abspath(__file__))
+IMAGE_FILES = ('coin.png',)  # Shipped images the game uses, loaded from ASSET_DIR
+SMALL_IMAGE_SIZE = 64  # Images no larger than this on either side share one atlas
+PREBAKE_CACHE_DIR = os.path.join(os.path.expanduser('~'), '.cache', 'infinite_runner')
+PREBAKE_VERSION = 1  # Bump when procedural art changes to ignore stale cache files
+
+
+class SurfaceCache:
+    """Bounded LRU cache of rendered surfaces.
+
+    get() returns the cached surface for key, calling build() to render it on
+    a miss. hits and misses are kept so quantization steps can be tuned.
+    """
+
+    def __init__(self, max_size):
+        self.max_size = max_size
+        self.surfaces = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key, build):
+        surface = self.surfaces.get(key)
+        if surface is not None:
+            self.hits += 1
+            self.surfaces.move_to_end(key)
+            return surface
+
+        self.misses += 1
+        surface = build()
+        self.surfaces[key] = surface
+        if len(self.surfaces) > self.max_size:
+            self.surfaces.popitem(last=False)
+        return surface
+
+    def hit_rate(self):
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+    def clear(self):
+        self.surfaces.clear()
+        self.hits = 0
+        self.misses = 0
+
+
+# Particle kinds
+PARTICLE_BURST = 0  # Free flight with gravity (stomp and pickup bursts)
+PARTICLE_RING = 1  # Flies outward along an angle from the player's center
+PARTICLE_STREAK = 2  # Dash trail streak, free flight without gravity
+
+PARTICLE_GRAVITY = 0.3
+
+
+class TextCache:
+    """Rendered text keyed by (font, text, color), with a digit atlas for numbers.
+
+    render() serves strings that change a few times a second at most.
+    blit_number() draws a label and a frequently changing number by blitting
+    the cached label and one glyph per digit from a per-font digit atlas, so
+    no new text is rasterized as the number counts up.
+    """
+
+    def __init__(self, max_size=TEXT_CACHE_SIZE):
+        self.surfaces = SurfaceCache(max_size)
+        self.digit_atlases = {}
+
+    def render(self, font, text, color):
+        return self.surfaces.get((font, text, color), lambda: font.render(text, True, color))
+
+    def digit_atlas(self, font, color):
+        """One surface holding '0'-'9' and the source rect of each digit"""
+        atlas = self.digit_atlases.get((font, color))
+        if atlas is None:
+            glyphs = [font.render(digit, True, color) for digit in '0123456789']
+            surface = pygame.Surface((sum(glyph.get_width() for glyph in glyphs),
+                                      max(glyph.get_height() for glyph in glyphs)), pygame.SRCALPHA)
+            areas = []
+            x = 0
+            for glyph in glyphs:
+                areas.append(surface.blit(glyph, (x, 0)))
+                x += glyph.get_width()
+            atlas = self.digit_atlases[(font, color)] = (surface, areas)
+        return atlas
+
+    def blit_number(self, screen, font, label, number, color, pos, suffix=''):
+        """Blit label, number and suffix left to right at pos and return the rect covered"""
+        x, y = pos
+        label_surface = self.render(font, label, color)
+        dirty = screen.blit(label_surface, (x, y))
+        x += label_surface.get_width()
+
+        atlas, areas = self.digit_atlas(font, color)
+        for digit in str(number):
+            area = areas[ord(digit) - 48] if digit.isdigit() else None
+            if area is None:
+                # Not a digit (a minus sign); fall back to the text cache
+                glyph = self.render(font, digit, color)
+                dirty.union_ip(screen.blit(glyph, (x, y)))
+                x += glyph.get_width()
+            else:
+                dirty.union_ip(screen.blit(atlas, (x, y), area))
+                x += area.width
+
+        if suffix:
+            dirty.union_ip(screen.blit(self.render(font, suffix, color), (x, y)))
+        return dirty
+
+
+# HUD text shared across frames and games
+text_cache = TextCache()
+
+
+class ParticleSystem:
+    """Pooled particles stored as NumPy columns (structure of arrays).
+
+    update() integrates every live particle at once and compacts dead ones by
+    moving live particles from the tail into the holes. Ring particles are
+    stored as angle/distance and drawn around the anchor passed to draw().
+    """
+
+    FLOAT_COLUMNS = ('x', 'y', 'vx', 'vy', 'ay', 'angle', 'distance', 'speed', 'life', 'max_life', 'size')
+    INT_COLUMNS = ('kind', 'color')
+
+    def __init__(self, capacity=256, rng=None):
+        self.capacity = capacity
+        self.rng = rng if rng is not None else random
+        self.count = 0
+        self.palette = []
+        self.color_indices = {}
+        for name in self.FLOAT_COLUMNS:
+            setattr(self, name, np.zeros(capacity))
+        for name in self.INT_COLUMNS:
+            setattr(self, name, np.zeros(capacity, dtype=np.int32))
+
+    def __len__(self):
+        return self.count
+
+    def grow(self):
+        self.capacity *= 2
+        for name in self.FLOAT_COLUMNS + self.INT_COLUMNS:
+            column = getattr(self, name)
+            grown = np.zeros(self.capacity, dtype=column.dtype)
+            grown[:self.count] = column[:self.count]
+            setattr(self, name, grown)
+
+    def color_index(self, color):
+        index = self.color_indices.get(color)
+        if index is None:
+            index = self.color_indices[color] = len(self.palette)
+            self.palette.append(color)
+        return index
+
+    def emit(self, kind, x=0, y=0, vx=0, vy=0, ay=0, angle=0, speed=0, life=30, size=6, color=WHITE):
+        if self.count == self.capacity:
+            self.grow()
+        i = self.count
+        self.kind[i] = kind
+        self.x[i] = x
+        self.y[i] = y
+        self.vx[i] = vx
+        self.vy[i] = vy
+        self.ay[i] = ay
+        self.angle[i] = angle
+        self.distance[i] = 0
+        self.speed[i] = speed
+        self.life[i] = life
+        self.max_life[i] = life
+        self.size[i] = size
+        self.color[i] = self.color_index(color)
+        self.count += 1
+
+    def burst(self, x, y, color):
+        """Spray 10 particles that arc up and fall, as for a stomp or pickup"""
+        for _ in range(10):
+            angle = self.rng.uniform(0, math.pi * 2)
+            speed = self.rng.uniform(2, 6)
+            self.emit(PARTICLE_BURST, x, y, vx=math.cos(angle) * speed, vy=math.sin(angle) * speed - 3,
+                      ay=PARTICLE_GRAVITY, life=30, size=6, color=color)
 
+    def update(self):
+        n = self.count
+        if n == 0:
+            return
+        self.x[:n] += self.vx[:n]
+        self.y[:n] += self.vy[:n]
+        self.vy[:n] += self.ay[:n]
+        self.distance[:n] += self.speed[:n]
+        self.life[:n] -= 1
+
+        alive = self.life[:n] > 0
+        live_count = int(np.count_nonzero(alive))
+        if live_count == n:
+            return
+
+        # Swap-remove: fill holes below live_count with survivors above it
+        holes = np.flatnonzero(~alive[:live_count])
+        movers = np.flatnonzero(alive[live_count:]) + live_count
+        if len(holes):
+            for name in self.FLOAT_COLUMNS + self.INT_COLUMNS:
+                column = getattr(self, name)
+                column[holes] = column[movers]
+        self.count = live_count
+
+    def draw(self, screen, anchor_x, anchor_y):
+        """Draw every live particle and return the rects they cover"""
+        n = self.count
+        rects = []
+        if n == 0:
+            return rects
+
+        kind = self.kind[:n]
+        ring = kind == PARTICLE_RING
+        x = np.where(ring, anchor_x + np.cos(self.angle[:n]) * self.distance[:n], self.x[:n])
+        y = np.where(ring, anchor_y + np.sin(self.angle[:n]) * self.distance[:n], self.y[:n])
+        alpha = self.life[:n] / self.max_life[:n]
+        sizes = (self.size[:n] * alpha).astype(np.int32)
+
+        palette = self.palette
+        for k, px, py, a, size, c in zip(kind.tolist(), x.tolist(), y.tolist(), alpha.tolist(),
+                                         sizes.tolist(), self.color[:n].tolist()):
+            if size <= 0:
+                continue
+            if k == PARTICLE_STREAK:
+                # Draw streak effect with gradient
+                for i in range(3):
+                    streak_size = size - i * 2
+                    if streak_size > 0:
+                        color_alpha = int(255 * a * (1 - i * 0.3))
+                        color = (255, 165, 0) if color_alpha > 128 else (255, 200, 100)
+                        rects.append(screen.circle(color, (int(px + i * 5), int(py)), streak_size))
+            else:
+                rects.append(screen.circle(palette[c], (int(px), int(py)), size))
+        return rects
+
+
+class Scheduler:
+    """Tick-based event queue driving powerup timers and cooldowns.
+
+    schedule() queues a callback to run a number of ticks from now and
+    returns the event, which can be cancelled or asked for its remaining
+    ticks. Events sit in a heap ordered by (due tick, scheduling order), so
+    tick() only touches the events that are due, however many are pending.
+    A callback of None makes a plain deadline that runs nothing.
+    """
 
-class Player:
     def __init__(self):
+        self.now = 0
+        self.queue = []
+        self.scheduled = 0
+
+    def schedule(self, delay, callback=None):
+        # [due, order, callback, active]; cancelled events are dropped when they come due
+        event = [self.now + delay, self.scheduled, callback, True]
+        self.scheduled += 1
+        heapq.heappush(self.queue, event)
+        return event
+
+    def cancel(self, event):
+        if event is not None:
+            event[3] = False
+
+    def remaining(self, event):
+        """Ticks until event fires, 0 once it has fired or been cancelled"""
+        if event is None or not event[3]:
+            return 0
+        return max(0, event[0] - self.now)
+
+    def tick(self):
+        """Advance one tick and run every callback that has come due"""
+        self.now += 1
+        queue = self.queue
+        while queue and queue[0][0] <= self.now:
+            event = heapq.heappop(queue)
+            if event[3]:
+                event[3] = False
+                if event[2] is not None:
+                    event[2]()
+
+
+class Player:
+    # Rendered player sprites, shared by every Player
+    sprite_cache = SurfaceCache(PLAYER_SPRITE_CACHE_SIZE)
+
+    def __init__(self, particles=None, rng=None, scheduler=None):
         self.x = 150
         self.y = GROUND_Y - 50
         self.width = 40
@@ -53,34 +397,34 @@ class Player:
         self.rotation = 0
         self.bounce_offset = 0
 
-        # Double jump effect
-        self.double_jump_particles = []
+        # Jump rings, powerup bursts and dash trail all go into this pool
+        self.particles = particles if particles is not None else ParticleSystem()
+        # Only drives particle speeds, sizes and trail jitter
+        self.rng = rng if rng is not None else random
+        # Powerup, dash and cooldown timers are events here rather than counters
+        self.scheduler = scheduler if scheduler is not None else Scheduler()
 
         # Score
         self.score = 0
 
         # Triple jump powerup
         self.triple_jump_active = False
-        self.triple_jump_duration = 0
+        self.triple_jump_event = None
         self.triple_jump_max_duration = 300  # 5 seconds at 60 FPS
         self.normal_max_jumps = 2
         self.powerup_max_jumps = 3
 
         # Dash powerup
         self.dash_active = False
-        self.dash_duration = 0
+        self.dash_event = None
         self.dash_max_duration = 300  # 5 seconds at 60 FPS
-        self.dash_cooldown = 0
+        self.dash_cooldown_event = None
         self.dash_cooldown_max = 45  # 0.75 seconds at 60 FPS
         self.is_dashing = False
-        self.dash_time = 0
+        self.dash_time_event = None
         self.dash_time_max = 30  # 0.5 seconds dash (doubled from 15)
         self.dash_speed_boost = 8  # Extra forward movement during dash
 
-        # Powerup activation particles
-        self.powerup_particles = []
-        self.dash_trail = []
-
     def jump(self):
         if self.jumps_left > 0:
             self.vel_y = JUMP_FORCE
@@ -95,15 +439,8 @@ class Player:
                 # Create extra fancy particles for triple jump
                 for i in range(12):
                     angle = (i / 12) * math.pi * 2
-                    self.double_jump_particles.append({
-                        'x': self.x + self.width / 2,
-                        'y': self.y + self.height / 2,
-                        'angle': angle,
-                        'distance': 0,
-                        'life': 25,
-                        'speed': 4,
-                        'color': POWERUP_COLOR
-                    })
+                    self.particles.emit(PARTICLE_RING, angle=angle, speed=4, life=25, size=8,
+                                        color=POWERUP_COLOR)
             elif self.jumps_left == 0 or (
                     self.triple_jump_active and self.jumps_left == 1):  # Double jump (second jump)
                 self.target_stretch = 1.5
@@ -111,22 +448,33 @@ class Player:
                 # Create spin effect particles - always blue for double jump
                 for i in range(8):
                     angle = (i / 8) * math.pi * 2
-                    self.double_jump_particles.append({
-                        'x': self.x + self.width / 2,
-                        'y': self.y + self.height / 2,
-                        'angle': angle,
-                        'distance': 0,
-                        'life': 20,
-                        'speed': 3,
-                        'color': PLAYER_COLOR  # Always blue for double jump
-                    })
+                    self.particles.emit(PARTICLE_RING, angle=angle, speed=3, life=20, size=8,
+                                        color=PLAYER_COLOR)  # Always blue for double jump
             else:  # First jump
                 self.target_stretch = 1.3
                 self.target_squash = 0.7
 
+    # Frames left on each timer, as the HUD and state hashes read them
+    @property
+    def triple_jump_duration(self):
+        return self.scheduler.remaining(self.triple_jump_event)
+
+    @property
+    def dash_duration(self):
+        return self.scheduler.remaining(self.dash_event)
+
+    @property
+    def dash_time(self):
+        return self.scheduler.remaining(self.dash_time_event)
+
+    @property
+    def dash_cooldown(self):
+        return self.scheduler.remaining(self.dash_cooldown_event)
+
     def activate_powerup(self):
         self.triple_jump_active = True
-        self.triple_jump_duration = self.triple_jump_max_duration
+        self.scheduler.cancel(self.triple_jump_event)
+        self.triple_jump_event = self.scheduler.schedule(self.triple_jump_max_duration, self.end_triple_jump)
         self.max_jumps = self.powerup_max_jumps
         if self.on_ground:
             self.jumps_left = self.powerup_max_jumps
@@ -134,83 +482,58 @@ class Player:
         # Explosion of particles
         for i in range(20):
             angle = (i / 20) * math.pi * 2
-            self.powerup_particles.append({
-                'x': self.x + self.width / 2,
-                'y': self.y + self.height / 2,
-                'angle': angle,
-                'distance': 0,
-                'life': 30,
-                'speed': random.uniform(3, 6),
-                'size': random.randint(4, 8),
-                'color': POWERUP_COLOR
-            })
+            speed = self.rng.uniform(3, 6)
+            self.particles.emit(PARTICLE_RING, angle=angle, speed=speed, life=30,
+                                size=self.rng.randint(4, 8), color=POWERUP_COLOR)
 
     def activate_dash(self):
         self.dash_active = True
-        self.dash_duration = self.dash_max_duration
+        self.scheduler.cancel(self.dash_event)
+        self.dash_event = self.scheduler.schedule(self.dash_max_duration, self.end_dash_powerup)
 
         # Explosion of dash particles
         for i in range(20):
             angle = (i / 20) * math.pi * 2
-            self.powerup_particles.append({
-                'x': self.x + self.width / 2,
-                'y': self.y + self.height / 2,
-                'angle': angle,
-                'distance': 0,
-                'life': 30,
-                'speed': random.uniform(3, 6),
-                'size': random.randint(4, 8),
-                'color': DASH_COLOR
-            })
+            speed = self.rng.uniform(3, 6)
+            self.particles.emit(PARTICLE_RING, angle=angle, speed=speed, life=30,
+                                size=self.rng.randint(4, 8), color=DASH_COLOR)
 
     def start_dash(self):
         if self.dash_active and not self.is_dashing and self.dash_cooldown == 0:
             self.is_dashing = True
-            self.dash_time = self.dash_time_max
-            self.dash_cooldown = self.dash_cooldown_max
+            self.dash_time_event = self.scheduler.schedule(self.dash_time_max, self.end_dash)
+            self.dash_cooldown_event = self.scheduler.schedule(self.dash_cooldown_max)
 
-    def update(self):
+    def end_triple_jump(self):
+        self.triple_jump_active = False
+        self.max_jumps = self.normal_max_jumps
+        if self.on_ground:
+            self.jumps_left = min(self.jumps_left, self.normal_max_jumps)
+
+    def end_dash_powerup(self):
+        self.dash_active = False
+        self.end_dash()
+
+    def end_dash(self):
+        self.is_dashing = False
+        self.scheduler.cancel(self.dash_time_event)
+
+    def update(self, ticks):
         # Apply gravity
         self.vel_y += GRAVITY
         self.y += self.vel_y
 
-        # Update triple jump powerup
-        if self.triple_jump_active:
-            self.triple_jump_duration -= 1
-            if self.triple_jump_duration <= 0:
-                self.triple_jump_active = False
-                self.max_jumps = self.normal_max_jumps
-                if self.on_ground:
-                    self.jumps_left = min(self.jumps_left, self.normal_max_jumps)
-
-        # Update dash powerup
-        if self.dash_active:
-            self.dash_duration -= 1
-            if self.dash_duration <= 0:
-                self.dash_active = False
-                self.is_dashing = False
-
-        # Update dash state
+        # Timers run out through the scheduler, which the Game ticks after this
         if self.is_dashing:
-            self.dash_time -= 1
-            if self.dash_time <= 0:
-                self.is_dashing = False
             # Boost forward during dash
             self.x += self.dash_speed_boost
             # Create enhanced dash trail with streaks
-            if random.random() < 0.8:  # More frequent trails
-                self.dash_trail.append({
-                    'x': self.x + self.width / 2,
-                    'y': self.y + self.height / 2,
-                    'life': 30,  # Longer lasting
-                    'size': random.randint(10, 20),
-                    'vx': random.uniform(-3, -1),  # Streak backward
-                    'vy': random.uniform(-2, 2)
-                })
-
-        # Update dash cooldown
-        if self.dash_cooldown > 0:
-            self.dash_cooldown -= 1
+            if self.rng.random() < 0.8:  # More frequent trails
+                size = self.rng.randint(10, 20)
+                vx = self.rng.uniform(-3, -1)  # Streak backward
+                vy = self.rng.uniform(-2, 2)
+                self.particles.emit(PARTICLE_STREAK, self.x + self.width / 2, self.y + self.height / 2,
+                                    vx=vx, vy=vy, life=30, size=size, color=DASH_COLOR)
 
         # Check ground collision
         if self.y >= GROUND_Y - self.height:
@@ -238,81 +561,40 @@ class Player:
 
         # Bounce animation when running
         if self.on_ground:
-            self.bounce_offset = math.sin(pygame.time.get_ticks() * 0.02) * 3
+            self.bounce_offset = math.sin(ticks * 0.02) * 3
 
         # Rotation in air - extra spin for double jump
         if not self.on_ground:
             if (self.triple_jump_active and self.jumps_left == 0) or (
                     not self.triple_jump_active and self.jumps_left == 0):  # Used double/triple jump
-                self.rotation = (pygame.time.get_ticks() * 0.5) % 360
+                self.rotation = (ticks * 0.5) % 360
             else:
                 self.rotation = min(self.vel_y * 2, 45)
         else:
             self.rotation = 0
 
-        # Update double jump particles
-        for p in self.double_jump_particles[:]:
-            p['distance'] += p['speed']
-            p['life'] -= 1
-            if p['life'] <= 0:
-                self.double_jump_particles.remove(p)
-
-        # Update powerup particles
-        for p in self.powerup_particles[:]:
-            p['distance'] += p['speed']
-            p['life'] -= 1
-            if p['life'] <= 0:
-                self.powerup_particles.remove(p)
-
-        # Update dash trail
-        for t in self.dash_trail[:]:
-            t['life'] -= 1
-            t['x'] += t.get('vx', 0)
-            t['y'] += t.get('vy', 0)
-            if t['life'] <= 0:
-                self.dash_trail.remove(t)
-
-    def draw(self, screen):
-        # Draw dash trail with streaks
-        for t in self.dash_trail:
-            alpha = t['life'] / 30
-            size = int(t['size'] * alpha)
-            if size > 0:
-                # Draw streak effect with gradient
-                for i in range(3):
-                    streak_size = size - i * 2
-                    if streak_size > 0:
-                        color_alpha = int(255 * alpha * (1 - i * 0.3))
-                        color = (255, 165, 0) if color_alpha > 128 else (255, 200, 100)
-                        pygame.draw.circle(screen, color, (int(t['x'] + i * 5), int(t['y'])), streak_size)
-
-        # Draw powerup particles
-        for p in self.powerup_particles:
-            x = self.x + self.width / 2 + math.cos(p['angle']) * p['distance']
-            y = self.y + self.height / 2 + math.sin(p['angle']) * p['distance']
-            alpha = p['life'] / 30
-            size = int(p['size'] * alpha)
-            if size > 0:
-                color = p.get('color', POWERUP_COLOR)
-                pygame.draw.circle(screen, color, (int(x), int(y)), size)
-
-        # Draw double jump particles
-        for p in self.double_jump_particles:
-            x = self.x + self.width / 2 + math.cos(p['angle']) * p['distance']
-            y = self.y + self.height / 2 + math.sin(p['angle']) * p['distance']
-            alpha = p['life'] / 25 if 'color' in p and p['color'] == POWERUP_COLOR else p['life'] / 20
-            size = int(8 * alpha)
-            if size > 0:
-                color = p.get('color', PLAYER_COLOR)
-                pygame.draw.circle(screen, color, (int(x), int(y)), size)
+    def draw(self, screen, pos=None):
+        # Center position; pos overrides (x, y) when drawing between steps
+        x, y = (self.x, self.y) if pos is None else pos
+        center_x = x + self.width / 2
+        center_y = y + self.height / 2 + self.bounce_offset
+
+        # Snap the pose so nearby poses share one cached sprite
+        key = (
+            round(self.squash / PLAYER_SCALE_STEP),
+            round(self.stretch / PLAYER_SCALE_STEP),
+            round(self.rotation / PLAYER_ROTATION_STEP) % (360 // PLAYER_ROTATION_STEP),
+            self.is_dashing,
+        )
+        rotated = Player.sprite_cache.get(key, lambda: self.render_sprite(*key))
+        rect = rotated.get_rect(center=(center_x, center_y))
+        return screen.blit(rotated, rect)
 
+    def render_sprite(self, squash_step, stretch_step, rotation_step, dashing):
+        """Render the body, eyes and dash glow for a quantized pose, rotated"""
         # Calculate squashed dimensions
-        draw_width = self.width * self.squash
-        draw_height = self.height * self.stretch
-
-        # Center position
-        center_x = self.x + self.width / 2
-        center_y = self.y + self.height / 2 + self.bounce_offset
+        draw_width = self.width * squash_step * PLAYER_SCALE_STEP
+        draw_height = self.height * stretch_step * PLAYER_SCALE_STEP
 
         # Create surface for rotation
         surf = pygame.Surface((draw_width * 2, draw_height * 2), pygame.SRCALPHA)
@@ -321,7 +603,7 @@ class Player:
         body_rect = pygame.Rect(draw_width / 2, draw_height / 2, draw_width, draw_height)
 
         # Glow when dashing
-        if self.is_dashing:
+        if dashing:
             for i in range(3):
                 glow_rect = body_rect.inflate(10 - i * 3, 10 - i * 3)
                 glow_surface = pygame.Surface((glow_rect.width, glow_rect.height), pygame.SRCALPHA)
@@ -339,19 +621,379 @@ class Player:
         pygame.draw.circle(surf, BLACK, (int(draw_width * 1.3), int(eye_y)), int(draw_width * 0.08))
 
         # Rotate
-        rotated = pygame.transform.rotate(surf, -self.rotation)
-        rect = rotated.get_rect(center=(center_x, center_y))
-        screen.blit(rotated, rect)
+        return pygame.transform.rotate(surf, -rotation_step * PLAYER_ROTATION_STEP)
 
     def get_rect(self):
         return pygame.Rect(self.x, self.y, self.width, self.height)
 
 
+def display_format(surface, alpha=False):
+    """surface converted to the display's pixel format, once there is a display"""
+    if pygame.display.get_surface() is None:
+        return surface
+    return surface.convert_alpha() if alpha else surface.convert()
+
+
+class SurfaceBackend:
+    """Draws with blit and pygame.draw onto a Surface, normally the display surface.
+
+    Every draw call returns the rect it covered, like the pygame calls it wraps.
+    """
+
+    def __init__(self, surface):
+        self.surface = surface
+
+    def blit(self, source, dest, area=None):
+        return self.surface.blit(source, dest, area)
+
+    def fill(self, color, rect=None):
+        return self.surface.fill(color, rect)
+
+    def rect(self, color, rect):
+        return pygame.draw.rect(self.surface, color, rect)
+
+    def circle(self, color, center, radius):
+        return pygame.draw.circle(self.surface, color, center, radius)
+
+    def line(self, color, start, end, width=1):
+        return pygame.draw.line(self.surface, color, start, end, width)
+
+    def set_clip(self, rect):
+        self.surface.set_clip(rect)
+
+    def get_rect(self):
+        return self.surface.get_rect()
+
+    def get_size(self):
+        return self.surface.get_size()
+
+    def present(self, rects=None):
+        """Show the frame, updating only rects when given"""
+        if rects is None:
+            pygame.display.flip()
+        else:
+            pygame.display.update(rects)
+
+
+class ScaledSurfaceBackend:
+    """Draws game coordinates into a Surface of render_size and scales it up to window on present.
+
+    The game keeps laying out a WIDTH x HEIGHT screen; draw calls are scaled
+    to the internal surface, so a smaller render size cuts fill cost with
+    its area. Blitted surfaces are scaled once per source area and reused
+    while the source lives, so like TextureBackend sources must not change
+    once blitted.
+    """
+
+    def __init__(self, window, render_size):
+        self.window = window
+        self.surface = display_format(pygame.Surface(render_size))
+        self.scale_x = render_size[0] / WIDTH
+        self.scale_y = render_size[1] / HEIGHT
+        self.screen_rect = pygame.Rect(0, 0, WIDTH, HEIGHT)
+        self.scaled = weakref.WeakKeyDictionary()  # Source surface -> {area: scaled surface}
+
+    def to_render(self, rect):
+        """A rect in game coordinates covering the same pixels of the internal surface"""
+        rect = pygame.Rect(rect)
+        left = math.floor(rect.left * self.scale_x)
+        top = math.floor(rect.top * self.scale_y)
+        return pygame.Rect(left, top, math.ceil(rect.right * self.scale_x) - left,
+                           math.ceil(rect.bottom * self.scale_y) - top)
+
+    def scaled_source(self, source, area):
+        areas = self.scaled.get(source)
+        if areas is None:
+            areas = self.scaled[source] = {}
+        key = None if area is None else tuple(area)
+        scaled = areas.get(key)
+        if scaled is None:
+            part = source if area is None else source.subsurface(pygame.Rect(area).clip(source.get_rect()))
+            size = self.to_render(part.get_rect()).size
+            # Nearest-neighbour keeps colorkeyed edges crisp
+            scaled = areas[key] = pygame.transform.scale(part, size)
+            if source.get_colorkey() is not None:
+                scaled.set_colorkey(source.get_colorkey())
+        return scaled
+
+    def blit(self, source, dest, area=None):
+        scaled = self.scaled_source(source, area)
+        size = source.get_size() if area is None else pygame.Rect(area).size
+        self.surface.blit(scaled, (math.floor(dest[0] * self.scale_x), math.floor(dest[1] * self.scale_y)))
+        return pygame.Rect((dest[0], dest[1]), size).clip(self.screen_rect)
+
+    def fill(self, color, rect=None):
+        if rect is None:
+            self.surface.fill(color)
+            return self.screen_rect.copy()
+        self.surface.fill(color, self.to_render(rect))
+        return pygame.Rect(rect).clip(self.screen_rect)
+
+    def rect(self, color, rect):
+        pygame.draw.rect(self.surface, color, self.to_render(rect))
+        return pygame.Rect(rect).clip(self.screen_rect)
+
+    def circle(self, color, center, radius):
+        pygame.draw.circle(self.surface, color, (center[0] * self.scale_x, center[1] * self.scale_y),
+                           max(1, round(radius * self.scale_x)))
+        return pygame.Rect(center[0] - radius, center[1] - radius, radius * 2, radius * 2).clip(self.screen_rect)
+
+    def line(self, color, start, end, width=1):
+        pygame.draw.line(self.surface, color, (start[0] * self.scale_x, start[1] * self.scale_y),
+                         (end[0] * self.scale_x, end[1] * self.scale_y), max(1, round(width * self.scale_y)))
+        rect = pygame.Rect(min(start[0], end[0]), min(start[1], end[1]),
+                           abs(end[0] - start[0]) + 1, abs(end[1] - start[1]) + 1)
+        return rect.inflate(width, width).clip(self.screen_rect)
+
+    def set_clip(self, rect):
+        self.surface.set_clip(None if rect is None else self.to_render(rect))
+
+    def get_rect(self):
+        return self.screen_rect.copy()
+
+    def get_size(self):
+        return self.screen_rect.size
+
+    def present(self, rects=None):
+        # The whole internal surface is scaled up every frame, so rects are ignored
+        if self.surface.get_size() == self.window.get_size():
+            self.window.blit(self.surface, (0, 0))
+        else:
+            pygame.transform.scale(self.surface, self.window.get_size(), self.window)
+        pygame.display.flip()
+
+
+class TextureBackend:
+    """Draws through an SDL2 Renderer into a pygame._sdl2.video Window.
+
+    A Surface is uploaded as a texture the first time it is blitted and the
+    texture is kept while the Surface lives, so baked sprites, atlases, sky
+    surfaces and cached text are composited by SDL's renderer, accelerated
+    when the machine has it. Surfaces must not change once blitted. Circles
+    are a white disc texture tinted and scaled to size. Clip rects must
+    start at the origin, as they are applied as the renderer's viewport.
+
+    Drawing uses game coordinates whatever the window size. With a
+    render_size other than the window's, frames are drawn into a target
+    texture of that size and stretched over the window on present.
+    """
+
+    DISC_RADIUS = 64
+
+    def __init__(self, window, render_size=None):
+        self.window = window
+        self.renderer = sdl2_video.Renderer(window)
+        self.textures = weakref.WeakKeyDictionary()
+        self.clip = self.screen_rect = pygame.Rect(0, 0, WIDTH, HEIGHT)
+
+        render_size = tuple(render_size or window.size)
+        self.target = None
+        if render_size != tuple(window.size):
+            self.target = sdl2_video.Texture(self.renderer, render_size, target=True)
+            self.renderer.target = self.target
+        # Set after choosing the target, as SDL keeps a scale per target
+        self.renderer.scale = (render_size[0] / WIDTH, render_size[1] / HEIGHT)
+
+        r = self.DISC_RADIUS
+        disc = pygame.Surface((r * 2, r * 2), pygame.SRCALPHA)
+        pygame.draw.circle(disc, WHITE, (r, r), r)
+        self.disc = sdl2_video.Texture.from_surface(self.renderer, disc)
+
+    def texture(self, surface):
+        texture = self.textures.get(surface)
+        if texture is None:
+            texture = self.textures[surface] = sdl2_video.Texture.from_surface(self.renderer, surface)
+        return texture
+
+    def blit(self, source, dest, area=None):
+        area = source.get_rect() if area is None else pygame.Rect(area)
+        rect = pygame.Rect(dest[0], dest[1], area.width, area.height)
+        self.texture(source).draw(area, rect)
+        return rect.clip(self.clip)
+
+    def fill(self, color, rect=None):
+        self.renderer.draw_color = pygame.Color(color)
+        if rect is None:
+            self.renderer.clear()
+            return self.clip.copy()
+        rect = pygame.Rect(rect)
+        self.renderer.fill_rect(rect)
+        return rect.clip(self.clip)
+
+    def rect(self, color, rect):
+        return self.fill(color, rect)
+
+    def circle(self, color, center, radius):
+        rect = pygame.Rect(center[0] - radius, center[1] - radius, radius * 2, radius * 2)
+        if radius > 0:
+            color = pygame.Color(color)
+            self.disc.color = color
+            self.disc.alpha = color.a
+            self.disc.draw(None, rect)
+        return rect.clip(self.clip)
+
+    def line(self, color, start, end, width=1):
+        if width > 1 and (start[0] == end[0] or start[1] == end[1]):
+            # Thick axis-aligned lines, centered like pygame.draw.line
+            left, right = sorted((start[0], end[0]))
+            top, bottom = sorted((start[1], end[1]))
+            if top == bottom:
+                rect = pygame.Rect(left, top - (width - 1) // 2, right - left + 1, width)
+            else:
+                rect = pygame.Rect(left - (width - 1) // 2, top, width, bottom - top + 1)
+            return self.fill(color, rect)
+        self.renderer.draw_color = pygame.Color(color)
+        self.renderer.draw_line(start, end)
+        rect = pygame.Rect(min(start[0], end[0]), min(start[1], end[1]),
+                           abs(end[0] - start[0]) + 1, abs(end[1] - start[1]) + 1)
+        return rect.clip(self.clip)
+
+    def set_clip(self, rect):
+        self.clip = self.screen_rect if rect is None else pygame.Rect(rect)
+        self.renderer.set_viewport(rect)
+
+    def get_rect(self):
+        return self.screen_rect.copy()
+
+    def get_size(self):
+        return self.screen_rect.size
+
+    def present(self, rects=None):
+        # The renderer always presents the whole window
+        if self.target is None:
+            self.renderer.present()
+            return
+        self.renderer.target = None
+        self.target.draw()
+        self.renderer.present()
+        self.renderer.target = self.target
+
+
+class SpriteAtlas:
+    """Animation frames packed into one surface and blitted by frame key.
+
+    frames maps a key to (surface, anchor), where anchor is the point in the
+    frame that lands on the position passed to blit(). Frames are packed
+    left to right in shelves, tallest first.
+    """
+
+    def __init__(self, frames, max_width=ATLAS_MAX_WIDTH):
+        order = sorted(frames, key=lambda key: -frames[key][0].get_height())
+        self.areas = {}
+        self.anchors = {}
+
+        x = y = shelf_height = width = 0
+        for key in order:
+            frame, anchor = frames[key]
+            w, h = frame.get_size()
+            if x + w > max_width and x > 0:
+                x = 0
+                y += shelf_height
+                shelf_height = 0
+            self.areas[key] = pygame.Rect(x, y, w, h)
+            self.anchors[key] = anchor
+            x += w
+            width = max(width, x)
+            shelf_height = max(shelf_height, h)
+
+        surface = pygame.Surface((max(width, 1), max(y + shelf_height, 1)), pygame.SRCALPHA)
+        for key in order:
+            surface.blit(frames[key][0], self.areas[key])
+        self.surface = display_format(surface, alpha=True)
+
+    def __contains__(self, key):
+        return key in self.areas
+
+    def blit(self, screen, key, pos):
+        """Blit frame key with its anchor at pos and return the rect covered"""
+        anchor_x, anchor_y = self.anchors[key]
+        return screen.blit(self.surface, (int(pos[0] - anchor_x), int(pos[1] - anchor_y)), self.areas[key])
+
+
+class AssetManager:
+    """Image files and prebaked procedural surfaces, loaded on first use.
+
+    image() loads a file from root; the small ones among files are packed
+    together into one SpriteAtlas and handed out as subsurfaces of it. prebaked() persists
+    generated surfaces as PNGs in cache_dir so later launches load them
+    instead of rendering them again. With cache_dir None nothing is written.
+    Only the sky and skyline go through it; entity atlases and player sprites
+    take a few milliseconds to draw and are built in memory by preload().
+    """
+
+    def __init__(self, root=ASSET_DIR, cache_dir=None, files=IMAGE_FILES):
+        self.root = root
+        self.files = files
+        self.cache_dir = cache_dir
+        self.images = {}
+        self.atlas = None
+
+    def image(self, name):
+        surface = self.images.get(name)
+        if surface is None:
+            if self.atlas is None:
+                self.atlas = self.pack_small_images()
+            if name in self.atlas:
+                surface = self.atlas.surface.subsurface(self.atlas.areas[name])
+            else:
+                surface = display_format(pygame.image.load(os.path.join(self.root, name)), alpha=True)
+            self.images[name] = surface
+        return surface
+
+    def pack_small_images(self):
+        frames = {}
+        for name in self.files:
+            image = pygame.image.load(os.path.join(self.root, name))
+            if max(image.get_size()) <= SMALL_IMAGE_SIZE:
+                frames[name] = (image, (0, 0))
+        return SpriteAtlas(frames)
+
+    def prebaked(self, name, key, build, colorkey=None):
+        """Surface from build(), cached on disk under name and key.
+
+        key must describe everything the surface depends on; a changed key
+        misses the cache and rebuilds. Writing the cache is best effort.
+        """
+        surface = path = None
+        if self.cache_dir is not None:
+            digest = zlib.crc32(repr((PREBAKE_VERSION, key)).encode())
+            path = os.path.join(self.cache_dir, f'{name}-{digest:08x}.png')
+            try:
+                surface = pygame.image.load(path)
+            except (pygame.error, OSError):
+                surface = None
+
+        if surface is None:
+            surface = build()
+            if path is not None:
+                # Write under a temporary name so a concurrent launch never reads half a file
+                temp_path = f'{path[:-4]}.{os.getpid()}.png'
+                try:
+                    os.makedirs(self.cache_dir, exist_ok=True)
+                    pygame.image.save(surface, temp_path)
+                    os.replace(temp_path, path)
+                except (pygame.error, OSError):
+                    pass
+
+        surface = display_format(surface)
+        if colorkey is not None:
+            surface.set_colorkey(colorkey, pygame.RLEACCEL)
+        return surface
+
+
+assets = AssetManager()
+
+
 class Enemy:
-    def __init__(self, x):
+    __slots__ = ('x', 'y', 'width', 'height', 'alive', 'squash', 'stretch', 'death_timer', 'wobble')
+
+    # Pre-rendered frames shared by every Enemy, built on first draw
+    atlas = None
+
+    def __init__(self, x, rng=None):
         self.x = x
         self.y = GROUND_Y - 40
-        self.width = 55
+        self.width = ENEMY_WIDTH
         self.height = 40
         self.alive = True
 
@@ -361,10 +1003,9 @@ class Enemy:
         self.death_timer = 0
 
         # Animation
-        self.wobble = random.uniform(0, math.pi * 2)
+        self.wobble = (rng if rng is not None else random).uniform(0, math.pi * 2)
 
     def update(self):
-        self.x -= SCROLL_SPEED
         self.wobble += 0.1
 
         # Death animation
@@ -373,38 +1014,67 @@ class Enemy:
             self.stretch = max(0, 1.0 - self.death_timer * 0.1)
             self.squash = 1.0 + self.death_timer * 0.1
 
-    def draw(self, screen):
+    def draw(self, screen, camera_x):
         if self.stretch <= 0:
-            return
+            return None
+        if Enemy.atlas is None:
+            Enemy.atlas = self.build_atlas()
 
-        # Calculate dimensions with wobble
+        # Wobble only moves the sprite; the frame is picked by (alive, death_timer)
         wobble_offset = math.sin(self.wobble) * 3
-        draw_width = self.width * self.squash
-        draw_height = self.height * self.stretch
-
-        center_x = self.x + self.width / 2
+        center_x = self.x - camera_x + self.width / 2
         center_y = self.y + self.height / 2 + wobble_offset
+        return Enemy.atlas.blit(screen, (self.alive, self.death_timer), (center_x, center_y))
+
+    def build_atlas(self):
+        """The alive pose and every death frame that still has height.
+
+        Death frames start at death_timer 0, the step the enemy is stomped on,
+        and are drawn without eyes like the rest of the death animation.
+        """
+        frames = {(True, 0): self.render_frame(1.0, 1.0, alive=True)}
+        death_timer = 0
+        while 1.0 - death_timer * 0.1 > 0:
+            squash = 1.0 + death_timer * 0.1
+            stretch = 1.0 - death_timer * 0.1
+            frames[(False, death_timer)] = self.render_frame(squash, stretch, alive=False)
+            death_timer += 1
+        return SpriteAtlas(frames)
+
+    def render_frame(self, squash, stretch, alive):
+        # Calculate dimensions
+        draw_width = self.width * squash
+        draw_height = self.height * stretch
+        surface = pygame.Surface((math.ceil(draw_width), math.ceil(draw_height)), pygame.SRCALPHA)
+        center_x = draw_width / 2
+        center_y = draw_height / 2
 
         # Body
-        rect = pygame.Rect(center_x - draw_width / 2, center_y - draw_height / 2,
-                           draw_width, draw_height)
-        pygame.draw.rect(screen, ENEMY_COLOR, rect, border_radius=8)
+        rect = pygame.Rect(0, 0, draw_width, draw_height)
+        pygame.draw.rect(surface, ENEMY_COLOR, rect, border_radius=8)
 
         # Eyes (angry)
-        if self.alive:
+        if alive:
             eye_y = center_y - draw_height * 0.2
             eye_size = int(draw_width * 0.12)
-            pygame.draw.circle(screen, WHITE, (int(center_x - draw_width * 0.25), int(eye_y)), eye_size)
-            pygame.draw.circle(screen, WHITE, (int(center_x + draw_width * 0.25), int(eye_y)), eye_size)
-            pygame.draw.circle(screen, BLACK, (int(center_x - draw_width * 0.25), int(eye_y)), eye_size // 2)
-            pygame.draw.circle(screen, BLACK, (int(center_x + draw_width * 0.25), int(eye_y)), eye_size // 2)
+            pygame.draw.circle(surface, WHITE, (int(center_x - draw_width * 0.25), int(eye_y)), eye_size)
+            pygame.draw.circle(surface, WHITE, (int(center_x + draw_width * 0.25), int(eye_y)), eye_size)
+            pygame.draw.circle(surface, BLACK, (int(center_x - draw_width * 0.25), int(eye_y)), eye_size // 2)
+            pygame.draw.circle(surface, BLACK, (int(center_x + draw_width * 0.25), int(eye_y)), eye_size // 2)
+        return surface, (center_x, center_y)
 
     def get_rect(self):
         return pygame.Rect(self.x, self.y, self.width, self.height)
 
 
 class GolfCart:
-    def __init__(self):
+    # Pre-rendered frames, built on first draw
+    atlas = None
+
+    def __init__(self, rng=None, smoke_rng=None):
+        # Engine rumble comes from rng; exhaust smoke is drawn from smoke_rng
+        self.rng = rng if rng is not None else random
+        self.smoke_rng = smoke_rng if smoke_rng is not None else random
         self.width = 120
         self.height = 80
         self.x = -self.width - 50
@@ -416,7 +1086,7 @@ class GolfCart:
         self.shake_offset = 0
         self.engine_rumble = 0
 
-    def update(self, player_x):
+    def update(self, player_x, ticks):
         # Follow player, staying slightly behind
         # Slower catch-up speed when far away
         distance_to_target = (player_x - 150) - self.x
@@ -427,66 +1097,82 @@ class GolfCart:
 
         # Animations
         self.wheel_rotation += SCROLL_SPEED * 2
-        self.shake_offset = math.sin(pygame.time.get_ticks() * 0.1) * 1.5
-        self.engine_rumble = random.uniform(-1, 1)
+        self.shake_offset = math.sin(ticks * 0.1) * 1.5
+        self.engine_rumble = self.rng.uniform(-1, 1)
 
     def draw(self, screen):
         draw_x = self.x + self.shake_offset + self.engine_rumble
         draw_y = self.y
+        if GolfCart.atlas is None:
+            GolfCart.atlas = self.build_atlas()
+
+        # Spokes repeat every 90 degrees
+        frame = int(self.wheel_rotation % 90) // CART_WHEEL_STEP
+        dirty = GolfCart.atlas.blit(screen, frame, (draw_x, draw_y))
+
+        # Exhaust smoke
+        if self.smoke_rng.random() < 0.3:
+            smoke_x = draw_x - 5
+            smoke_y = draw_y + self.height - 20
+            dirty.union_ip(screen.circle((100, 100, 100), (int(smoke_x), int(smoke_y)),
+                                         self.smoke_rng.randint(3, 6)))
+        return dirty
+
+    def build_atlas(self):
+        """One frame per wheel angle step over a quarter turn"""
+        frames = {}
+        for frame in range(90 // CART_WHEEL_STEP):
+            # Wheels hang 5px below the cart's height
+            surface = pygame.Surface((self.width, self.height + 6), pygame.SRCALPHA)
+            self.render_frame(surface, frame * CART_WHEEL_STEP)
+            frames[frame] = (surface, (0, 0))
+        return SpriteAtlas(frames)
+
+    def render_frame(self, surface, wheel_rotation):
+        draw_x = 0
+        draw_y = 0
 
         # Cart body
         body_rect = pygame.Rect(draw_x, draw_y + 20, self.width, self.height - 30)
-        pygame.draw.rect(screen, CART_COLOR, body_rect, border_radius=8)
+        pygame.draw.rect(surface, CART_COLOR, body_rect, border_radius=8)
 
         # Cart top/roof
         roof_rect = pygame.Rect(draw_x + 10, draw_y, self.width - 20, 30)
-        pygame.draw.rect(screen, (220, 220, 220), roof_rect, border_radius=6)
+        pygame.draw.rect(surface, (220, 220, 220), roof_rect, border_radius=6)
 
         # Windshield
         windshield = pygame.Rect(draw_x + 15, draw_y + 5, 35, 20)
-        pygame.draw.rect(screen, (150, 200, 255), windshield, border_radius=4)
+        pygame.draw.rect(surface, (150, 200, 255), windshield, border_radius=4)
 
         # Front grill
         grill_rect = pygame.Rect(draw_x + self.width - 15, draw_y + 30, 10, 25)
-        pygame.draw.rect(screen, (40, 40, 40), grill_rect, border_radius=2)
+        pygame.draw.rect(surface, (40, 40, 40), grill_rect, border_radius=2)
 
         # Headlights
-        pygame.draw.circle(screen, (255, 50, 50), (int(draw_x + self.width - 10), int(draw_y + 35)), 6)
-        pygame.draw.circle(screen, (255, 100, 100), (int(draw_x + self.width - 10), int(draw_y + 35)), 4)
+        pygame.draw.circle(surface, (255, 50, 50), (int(draw_x + self.width - 10), int(draw_y + 35)), 6)
+        pygame.draw.circle(surface, (255, 100, 100), (int(draw_x + self.width - 10), int(draw_y + 35)), 4)
 
         # Wheels
         wheel_y = draw_y + self.height - 10
 
-        # Back wheel
-        pygame.draw.circle(screen, BLACK, (int(draw_x + 25), int(wheel_y)), 15)
-        pygame.draw.circle(screen, (200, 200, 200), (int(draw_x + 25), int(wheel_y)), 12)
-        for i in range(4):
-            angle = math.radians(self.wheel_rotation + i * 90)
-            x1 = draw_x + 25 + math.cos(angle) * 5
-            y1 = wheel_y + math.sin(angle) * 5
-            x2 = draw_x + 25 + math.cos(angle) * 10
-            y2 = wheel_y + math.sin(angle) * 10
-            pygame.draw.line(screen, (150, 150, 150), (x1, y1), (x2, y2), 2)
-
-        # Front wheel
-        pygame.draw.circle(screen, BLACK, (int(draw_x + self.width - 25), int(wheel_y)), 15)
-        pygame.draw.circle(screen, (200, 200, 200), (int(draw_x + self.width - 25), int(wheel_y)), 12)
-        for i in range(4):
-            angle = math.radians(self.wheel_rotation + i * 90)
-            x1 = draw_x + self.width - 25 + math.cos(angle) * 5
-            y1 = wheel_y + math.sin(angle) * 5
-            x2 = draw_x + self.width - 25 + math.cos(angle) * 10
-            y2 = wheel_y + math.sin(angle) * 10
-            pygame.draw.line(screen, (150, 150, 150), (x1, y1), (x2, y2), 2)
-
-        # Exhaust smoke
-        if random.random() < 0.3:
-            smoke_x = draw_x - 5
-            smoke_y = draw_y + self.height - 20
-            pygame.draw.circle(screen, (100, 100, 100), (int(smoke_x), int(smoke_y)), random.randint(3, 6))
+        for wheel_x in (draw_x + 25, draw_x + self.width - 25):
+            pygame.draw.circle(surface, BLACK, (int(wheel_x), int(wheel_y)), 15)
+            pygame.draw.circle(surface, (200, 200, 200), (int(wheel_x), int(wheel_y)), 12)
+            for i in range(4):
+                angle = math.radians(wheel_rotation + i * 90)
+                x1 = wheel_x + math.cos(angle) * 5
+                y1 = wheel_y + math.sin(angle) * 5
+                x2 = wheel_x + math.cos(angle) * 10
+                y2 = wheel_y + math.sin(angle) * 10
+                pygame.draw.line(surface, (150, 150, 150), (x1, y1), (x2, y2), 2)
 
 
 class Coin:
+    __slots__ = ('x', 'y', 'size', 'collected', 'rotation', 'scale')
+
+    # Pre-rendered frames shared by every Coin, built on first draw
+    atlas = None
+
     def __init__(self, x, y):
         self.x = x
         self.y = y
@@ -495,27 +1181,48 @@ class Coin:
         self.scale = 1.0
         self.rotation = 0
 
-    def update(self):
-        self.x -= SCROLL_SPEED
+    def update(self, ticks):
         self.rotation += 5
-        self.scale = 1.0 + math.sin(pygame.time.get_ticks() * 0.01) * 0.1
+        self.scale = 1.0 + math.sin(ticks * 0.01) * 0.1
 
-    def draw(self, screen):
+    def draw(self, screen, camera_x):
         if not self.collected:
-            draw_size = int(self.size * self.scale)
-            width_factor = abs(math.cos(math.radians(self.rotation)))
-            draw_width = int(draw_size * width_factor)
-
-            coin_rect = pygame.Rect(self.x + (self.size - draw_width) // 2,
-                                    self.y, draw_width, draw_size)
-            pygame.draw.ellipse(screen, COIN_COLOR, coin_rect)
-            pygame.draw.ellipse(screen, (200, 160, 0), coin_rect, 2)
+            if Coin.atlas is None:
+                Coin.atlas = self.build_atlas()
+            # The spin repeats every 180 degrees
+            frame = (int(self.size * self.scale), self.rotation % 180)
+            return Coin.atlas.blit(screen, frame, (self.x - camera_x, self.y))
+        return None
+
+    def build_atlas(self):
+        """A frame per pulse size and per 5 degrees of spin"""
+        frames = {}
+        for draw_size in range(int(self.size * 0.9) - 1, int(self.size * 1.1) + 2):
+            for rotation in range(0, 180, 5):
+                frames[(draw_size, rotation)] = self.render_frame(draw_size, rotation)
+        return SpriteAtlas(frames)
+
+    def render_frame(self, draw_size, rotation):
+        width_factor = abs(math.cos(math.radians(rotation)))
+        draw_width = int(draw_size * width_factor)
+
+        # A 2px margin catches the outline of very thin ellipses
+        surface = pygame.Surface((self.size + 4, draw_size + 2), pygame.SRCALPHA)
+        coin_rect = pygame.Rect(2 + (self.size - draw_width) // 2, 0, draw_width, draw_size)
+        pygame.draw.ellipse(surface, COIN_COLOR, coin_rect)
+        pygame.draw.ellipse(surface, (200, 160, 0), coin_rect, 2)
+        return surface, (2, 0)
 
     def get_rect(self):
         return pygame.Rect(self.x, self.y, self.size, self.size)
 
 
 class PowerUp:
+    __slots__ = ('x', 'y', 'size', 'collected', 'float_offset', 'rotation', 'pulse')
+
+    # Pre-rendered frames shared by every PowerUp, built on first draw
+    atlas = None
+
     def __init__(self, x, y):
         self.x = x
         self.y = y
@@ -525,51 +1232,71 @@ class PowerUp:
         self.rotation = 0
         self.pulse = 1.0
 
-    def update(self):
-        self.x -= SCROLL_SPEED
-        self.float_offset = math.sin(pygame.time.get_ticks() * 0.005) * 10
+    def update(self, ticks):
+        self.float_offset = math.sin(ticks * 0.005) * 10
         self.rotation += 3
-        self.pulse = 1.0 + math.sin(pygame.time.get_ticks() * 0.01) * 0.2
+        self.pulse = 1.0 + math.sin(ticks * 0.01) * 0.2
 
-    def draw(self, screen):
+    def draw(self, screen, camera_x):
         if not self.collected:
-            draw_x = self.x
+            if PowerUp.atlas is None:
+                PowerUp.atlas = self.build_atlas()
+            draw_x = self.x - camera_x
             draw_y = self.y + self.float_offset
             draw_size = int(self.size * self.pulse)
-
-            # Outer glow
-            for i in range(3):
-                glow_size = draw_size + (3 - i) * 5
-                pygame.draw.circle(screen, POWERUP_COLOR,
-                                   (int(draw_x + self.size // 2), int(draw_y + self.size // 2)),
-                                   glow_size // 2)
-
-            # Main star shape (triple jump symbol)
-            center_x = draw_x + self.size // 2
-            center_y = draw_y + self.size // 2
-
-            # Draw three arrows pointing up
-            for i in range(3):
-                angle_offset = (i - 1) * 25
-                arrow_base_y = center_y + 8
-                arrow_tip_y = center_y - 10
-                arrow_x = center_x + math.sin(math.radians(angle_offset)) * 8
-
-                pygame.draw.line(screen, WHITE,
-                                 (arrow_x, arrow_base_y),
-                                 (arrow_x, arrow_tip_y), 3)
-
-                pygame.draw.polygon(screen, WHITE, [
-                    (arrow_x, arrow_tip_y),
-                    (arrow_x - 4, arrow_tip_y + 6),
-                    (arrow_x + 4, arrow_tip_y + 6)
-                ])
+            center = (int(draw_x + self.size // 2), int(draw_y + self.size // 2))
+            return PowerUp.atlas.blit(screen, draw_size, center)
+        return None
+
+    def build_atlas(self):
+        """A frame per pulse size"""
+        frames = {}
+        for draw_size in range(int(self.size * 0.8) - 1, int(self.size * 1.2) + 2):
+            frames[draw_size] = self.render_frame(draw_size)
+        return SpriteAtlas(frames)
+
+    def render_frame(self, draw_size):
+        # Sized for the outermost glow circle
+        c = (draw_size + 15) // 2 + 1
+        surface = pygame.Surface((c * 2 + 1, c * 2 + 1), pygame.SRCALPHA)
+
+        # Outer glow
+        for i in range(3):
+            glow_size = draw_size + (3 - i) * 5
+            pygame.draw.circle(surface, POWERUP_COLOR, (c, c), glow_size // 2)
+
+        center_x = c
+        center_y = c
+
+        # Main star shape (triple jump symbol)
+        # Draw three arrows pointing up
+        for i in range(3):
+            angle_offset = (i - 1) * 25
+            arrow_base_y = center_y + 8
+            arrow_tip_y = center_y - 10
+            arrow_x = center_x + math.sin(math.radians(angle_offset)) * 8
+
+            pygame.draw.line(surface, WHITE,
+                             (arrow_x, arrow_base_y),
+                             (arrow_x, arrow_tip_y), 3)
+
+            pygame.draw.polygon(surface, WHITE, [
+                (arrow_x, arrow_tip_y),
+                (arrow_x - 4, arrow_tip_y + 6),
+                (arrow_x + 4, arrow_tip_y + 6)
+            ])
+        return surface, (c, c)
 
     def get_rect(self):
         return pygame.Rect(self.x, self.y + self.float_offset, self.size, self.size)
 
 
 class DashPowerUp:
+    __slots__ = ('x', 'y', 'size', 'collected', 'float_offset', 'rotation', 'pulse')
+
+    # Pre-rendered frames shared by every DashPowerUp, built on first draw
+    atlas = None
+
     def __init__(self, x, y):
         self.x = x
         self.y = y
@@ -579,135 +1306,137 @@ class DashPowerUp:
         self.rotation = 0
         self.pulse = 1.0
 
-    def update(self):
-        self.x -= SCROLL_SPEED
-        self.float_offset = math.sin(pygame.time.get_ticks() * 0.005) * 10
+    def update(self, ticks):
+        self.float_offset = math.sin(ticks * 0.005) * 10
         self.rotation += 3
-        self.pulse = 1.0 + math.sin(pygame.time.get_ticks() * 0.01) * 0.2
+        self.pulse = 1.0 + math.sin(ticks * 0.01) * 0.2
 
-    def draw(self, screen):
+    def draw(self, screen, camera_x):
         if not self.collected:
-            draw_x = self.x
+            if DashPowerUp.atlas is None:
+                DashPowerUp.atlas = self.build_atlas()
+            draw_x = self.x - camera_x
             draw_y = self.y + self.float_offset
             draw_size = int(self.size * self.pulse)
-
-            # Outer glow
-            for i in range(3):
-                glow_size = draw_size + (3 - i) * 5
-                pygame.draw.circle(screen, DASH_COLOR,
-                                   (int(draw_x + self.size // 2), int(draw_y + self.size // 2)),
-                                   glow_size // 2)
-
-            # Main lightning bolt symbol
-            center_x = draw_x + self.size // 2
-            center_y = draw_y + self.size // 2
-
-            # Draw lightning bolt
-            bolt_points = [
-                (center_x - 3, center_y - 10),
-                (center_x + 2, center_y - 2),
-                (center_x - 2, center_y + 2),
-                (center_x + 5, center_y + 10),
-                (center_x + 1, center_y + 2),
-                (center_x + 3, center_y - 2),
-            ]
-            pygame.draw.polygon(screen, WHITE, bolt_points)
+            center = (int(draw_x + self.size // 2), int(draw_y + self.size // 2))
+            return DashPowerUp.atlas.blit(screen, draw_size, center)
+        return None
+
+    def build_atlas(self):
+        """A frame per pulse size"""
+        frames = {}
+        for draw_size in range(int(self.size * 0.8) - 1, int(self.size * 1.2) + 2):
+            frames[draw_size] = self.render_frame(draw_size)
+        return SpriteAtlas(frames)
+
+    def render_frame(self, draw_size):
+        # Sized for the outermost glow circle
+        c = (draw_size + 15) // 2 + 1
+        surface = pygame.Surface((c * 2 + 1, c * 2 + 1), pygame.SRCALPHA)
+
+        # Outer glow
+        for i in range(3):
+            glow_size = draw_size + (3 - i) * 5
+            pygame.draw.circle(surface, DASH_COLOR, (c, c), glow_size // 2)
+
+        center_x = c
+        center_y = c
+
+        # Main lightning bolt symbol
+        # Draw lightning bolt
+        bolt_points = [
+            (center_x - 3, center_y - 10),
+            (center_x + 2, center_y - 2),
+            (center_x - 2, center_y + 2),
+            (center_x + 5, center_y + 10),
+            (center_x + 1, center_y + 2),
+            (center_x + 3, center_y - 2),
+        ]
+        pygame.draw.polygon(surface, WHITE, bolt_points)
+        return surface, (c, c)
 
     def get_rect(self):
         return pygame.Rect(self.x, self.y + self.float_offset, self.size, self.size)
 
 
-class ParticleEffect:
-    def __init__(self, x, y, color):
-        self.particles = []
-        for _ in range(10):
-            angle = random.uniform(0, math.pi * 2)
-            speed = random.uniform(2, 6)
-            self.particles.append({
-                'x': x,
-                'y': y,
-                'vx': math.cos(angle) * speed,
-                'vy': math.sin(angle) * speed - 3,
-                'life': 30,
-                'color': color
-            })
-
-    def update(self):
-        for p in self.particles:
-            p['x'] += p['vx']
-            p['y'] += p['vy']
-            p['vy'] += 0.3
-            p['life'] -= 1
-
-        self.particles = [p for p in self.particles if p['life'] > 0]
-
-    def draw(self, screen):
-        for p in self.particles:
-            alpha = p['life'] / 30
-            size = int(6 * alpha)
-            if size > 0:
-                pygame.draw.circle(screen, p['color'], (int(p['x']), int(p['y'])), size)
-
-    def is_done(self):
-        return len(self.particles) == 0
-
-
-def lerp_color(color1, color2, t):
-    """Linear interpolation between two colors"""
-    t = max(0, min(1, t))  # Clamp t between 0 and 1
-    return (
-        int(color1[0] + (color2[0] - color1[0]) * t),
-        int(color1[1] + (color2[1] - color1[1]) * t),
-        int(color1[2] + (color2[2] - color1[2]) * t)
-    )
+# Sunset sky bands: (start, end) as a fraction of screen height, top color, bottom color
+SUNSET_BANDS = [
+    (0.0, 0.3, (255, 150, 200), (255, 140, 100)),  # Top third: pink to orange
+    (0.3, 0.6, (255, 140, 100), (150, 180, 220)),  # Middle third: orange to light blue
+    (0.6, 1.0, (150, 180, 220), (100, 150, 200)),  # Bottom third: light blue to darker blue
+]
+SUNSET_START = 12000
+SUNSET_END = 15000
+SKY_TRANSITION_STEPS = 32  # Distinct pre-blended skies between 12000 and 15000
+SKY_CACHE_SIZE = 4  # Transition skies kept around; distance only moves forward
+
+_sunset_colors = None
+_sunset_surface = None
+_transition_surfaces = {}
+
+
+def lerp_colors(color1, color2, t):
+    """Linear interpolation between arrays of colors, t clamped to [0, 1] and truncated to ints"""
+    t = np.clip(t, 0, 1)
+    return (color1 + (color2 - color1) * t).astype(np.int64)
+
+
+def sunset_colors():
+    """Per-scanline colors of the full sunset gradient, shape (HEIGHT, 3)"""
+    global _sunset_colors
+    if _sunset_colors is None:
+        progress = np.arange(HEIGHT) / HEIGHT
+        colors = np.zeros((HEIGHT, 3), dtype=np.int64)
+        for start, end, top, bottom in SUNSET_BANDS:
+            rows = (progress >= start) & (progress < end)
+            local_progress = (progress[rows] - start) / (end - start)
+            colors[rows] = lerp_colors(np.array(top), np.array(bottom), local_progress[:, np.newaxis])
+        _sunset_colors = colors
+    return _sunset_colors
+
+
+def gradient_surface(colors):
+    """Build a full-screen surface with one color per scanline"""
+    surface = pygame.Surface((WIDTH, HEIGHT))
+    pygame.surfarray.blit_array(surface, np.broadcast_to(colors[np.newaxis], (WIDTH, HEIGHT, 3)))
+    return surface
+
+
+def get_sky_surface(transition_progress):
+    """Cached sky surface for a transition progress in [0, 1]"""
+    global _sunset_surface
+    step = round(max(0, min(1, transition_progress)) * SKY_TRANSITION_STEPS)
+
+    if step == SKY_TRANSITION_STEPS:
+        if _sunset_surface is None:
+            _sunset_surface = assets.prebaked('sunset', (WIDTH, HEIGHT, SUNSET_BANDS),
+                                              lambda: gradient_surface(sunset_colors()))
+        return _sunset_surface
+
+    surface = _transition_surfaces.get(step)
+    if surface is None:
+        if len(_transition_surfaces) >= SKY_CACHE_SIZE:
+            del _transition_surfaces[next(iter(_transition_surfaces))]
+        # Interpolate from SKY_BLUE to target gradient color
+        colors = lerp_colors(np.array(SKY_BLUE), sunset_colors(), step / SKY_TRANSITION_STEPS)
+        surface = gradient_surface(colors)
+        _transition_surfaces[step] = surface
+    return surface
 
 
 def draw_gradient_sky(screen, distance):
     """Draw sky with gradient effect"""
     # Start transitioning at 12000, complete by 15000
-    transition_start = 12000
-    transition_end = 15000
+    transition_start = SUNSET_START
+    transition_end = SUNSET_END
 
     if distance < transition_start:
         # Clear blue sky
         screen.fill(SKY_BLUE)
-    elif distance >= transition_end:
-        # Full sunset gradient: pink at top, orange in middle, blue at bottom
-        for y in range(HEIGHT):
-            progress = y / HEIGHT
-            if progress < 0.3:
-                # Top third: pink to orange
-                local_progress = progress / 0.3
-                color = lerp_color((255, 150, 200), (255, 140, 100), local_progress)
-            elif progress < 0.6:
-                # Middle third: orange to light blue
-                local_progress = (progress - 0.3) / 0.3
-                color = lerp_color((255, 140, 100), (150, 180, 220), local_progress)
-            else:
-                # Bottom third: light blue to darker blue
-                local_progress = (progress - 0.6) / 0.4
-                color = lerp_color((150, 180, 220), (100, 150, 200), local_progress)
-            pygame.draw.line(screen, color, (0, y), (WIDTH, y))
     else:
-        # Transition from blue to gradient
+        # Transition from blue to gradient, then the full sunset
         transition_progress = (distance - transition_start) / (transition_end - transition_start)
-
-        for y in range(HEIGHT):
-            progress = y / HEIGHT
-            # Target gradient colors
-            if progress < 0.3:
-                local_progress = progress / 0.3
-                target_color = lerp_color((255, 150, 200), (255, 140, 100), local_progress)
-            elif progress < 0.6:
-                local_progress = (progress - 0.3) / 0.3
-                target_color = lerp_color((255, 140, 100), (150, 180, 220), local_progress)
-            else:
-                local_progress = (progress - 0.6) / 0.4
-                target_color = lerp_color((150, 180, 220), (100, 150, 200), local_progress)
-
-            # Interpolate from SKY_BLUE to target gradient color
-            color = lerp_color(SKY_BLUE, target_color, transition_progress)
-            pygame.draw.line(screen, color, (0, y), (WIDTH, y))
+        screen.blit(get_sky_surface(transition_progress), (0, 0))
 
 
 def draw_sun(screen, distance):
@@ -717,7 +1446,7 @@ def draw_sun(screen, distance):
     # At 15000: sun is at horizon (half visible)
 
     if distance > 15000:
-        return
+        return None
 
     # Calculate sun position
     # Start high, end at horizon
@@ -730,15 +1459,17 @@ def draw_sun(screen, distance):
     sun_radius = 50
 
     # Draw sun glow
+    dirty = None
     for i in range(5):
         glow_radius = sun_radius + (5 - i) * 10
         alpha = 50 - i * 10
         glow_color = (255, 220, 100)
-        pygame.draw.circle(screen, glow_color, (int(sun_x), int(sun_y)), glow_radius)
+        glow_rect = screen.circle(glow_color, (int(sun_x), int(sun_y)), glow_radius)
+        dirty = dirty or glow_rect
 
     # Draw main sun
-    pygame.draw.circle(screen, (255, 230, 100), (int(sun_x), int(sun_y)), sun_radius)
-    pygame.draw.circle(screen, (255, 200, 50), (int(sun_x), int(sun_y)), sun_radius - 5)
+    screen.circle((255, 230, 100), (int(sun_x), int(sun_y)), sun_radius)
+    screen.circle((255, 200, 50), (int(sun_x), int(sun_y)), sun_radius - 5)
 
     # If sun is at/below horizon, clip it
     if sun_y >= GROUND_Y - sun_radius:
@@ -748,6 +1479,114 @@ def draw_sun(screen, distance):
         # Sun already drawn above, just need to re-establish clipping
         screen.set_clip(None)
 
+    return dirty
+
+
+# Boston-inspired buildings, in skyline-local x coordinates within one WIDTH period
+BOSTON_BUILDINGS = [
+    # Hancock Tower (tallest)
+    {'x': 100, 'w': 60, 'h': 200, 'color': (70, 90, 120), 'windows': True},
+    # Prudential Tower
+    {'x': 180, 'w': 50, 'h': 180, 'color': (80, 100, 130), 'windows': True},
+    # Small building
+    {'x': 240, 'w': 35, 'h': 100, 'color': (90, 110, 140), 'windows': True},
+    # Custom House Tower (with spire)
+    {'x': 290, 'w': 40, 'h': 140, 'color': (75, 95, 125), 'windows': True, 'spire': True},
+    # Medium building
+    {'x': 340, 'w': 45, 'h': 120, 'color': (85, 105, 135), 'windows': True},
+    # State Street building
+    {'x': 395, 'w': 55, 'h': 160, 'color': (65, 85, 115), 'windows': True},
+    # Small building
+    {'x': 460, 'w': 30, 'h': 90, 'color': (95, 115, 145), 'windows': True},
+    # Federal Reserve
+    {'x': 500, 'w': 50, 'h': 130, 'color': (70, 90, 120), 'windows': True},
+    # Wide building
+    {'x': 560, 'w': 65, 'h': 110, 'color': (80, 100, 130), 'windows': True},
+    # Tall narrow
+    {'x': 635, 'w': 35, 'h': 170, 'color': (75, 95, 125), 'windows': True},
+    # Medium
+    {'x': 680, 'w': 40, 'h': 125, 'color': (85, 105, 135), 'windows': True},
+    # Short wide
+    {'x': 730, 'w': 50, 'h': 95, 'color': (90, 110, 140), 'windows': True},
+]
+SKYLINE_WINDOW_SEED = 1630  # Fixed seed so the same windows are lit every run
+SKYLINE_KEY_COLOR = (255, 0, 255)  # Transparent background of the baked strip
+
+_skyline_strip = None
+
+
+def bake_boston_skyline():
+    """Render two periods of the skyline into one strip, bottom edge on the ground.
+
+    Two periods let a single blit cover the whole screen at any parallax offset.
+    Windows are lit from a fixed seed, so the pattern is stable frame to frame.
+    """
+    spire_h = 30
+    strip_height = max(b['h'] for b in BOSTON_BUILDINGS) + spire_h
+    strip = pygame.Surface((WIDTH * 2, strip_height))
+    strip.fill(SKYLINE_KEY_COLOR)
+
+    window_rng = random.Random(SKYLINE_WINDOW_SEED)
+    lit_windows = []
+
+    for building in BOSTON_BUILDINGS:
+        y = strip_height - building['h']
+        lit = []
+
+        # Draw windows if specified
+        if building.get('windows'):
+            window_w = 4
+            window_h = 6
+            spacing_x = 8
+            spacing_y = 10
+
+            for wy in range(y + 10, y + building['h'] - 5, spacing_y):
+                for wx in range(6, building['w'] - 6, spacing_x):
+                    # Random lit windows
+                    if window_rng.random() > 0.3:
+                        lit.append((wx, wy, window_w, window_h))
+        lit_windows.append(lit)
+
+    for period in (0, WIDTH):
+        for building, lit in zip(BOSTON_BUILDINGS, lit_windows):
+            x = building['x'] + period
+            y = strip_height - building['h']
+
+            # Draw building body
+            pygame.draw.rect(strip, building['color'],
+                             (x, y, building['w'], building['h']))
+
+            # Draw darker outline
+            pygame.draw.rect(strip, (50, 60, 80),
+                             (x, y, building['w'], building['h']), 2)
+
+            window_color = (200, 220, 255)
+            for wx, wy, window_w, window_h in lit:
+                pygame.draw.rect(strip, window_color, (x + wx, wy, window_w, window_h))
+
+            # Draw spire for Custom House Tower
+            if building.get('spire'):
+                spire_w = 12
+                spire_x = x + building['w'] // 2 - spire_w // 2
+                spire_y = y - spire_h
+                pygame.draw.polygon(strip, (100, 120, 150), [
+                    (spire_x + spire_w // 2, spire_y),
+                    (spire_x, spire_y + spire_h),
+                    (spire_x + spire_w, spire_y + spire_h)
+                ])
+
+    strip.set_colorkey(SKYLINE_KEY_COLOR, pygame.RLEACCEL)
+    return strip
+
+
+def skyline_strip():
+    """The baked skyline, loaded or built on first use"""
+    global _skyline_strip
+    if _skyline_strip is None:
+        _skyline_strip = assets.prebaked('skyline', (WIDTH, BOSTON_BUILDINGS, SKYLINE_WINDOW_SEED),
+                                         bake_boston_skyline, colorkey=SKYLINE_KEY_COLOR)
+    return _skyline_strip
+
 
 def draw_boston_skyline(screen, scroll_offset, distance):
     """Draw a simplified Boston skyline in the background"""
@@ -771,8 +1610,6 @@ def draw_boston_skyline(screen, scroll_offset, distance):
         slide_progress = 1.0
         base_slide_offset = 0
 
-    skyline_y = GROUND_Y
-
     # Buildings move slower than foreground (parallax effect)
     # Only apply parallax after buildings are fully visible
     if distance >= skyline_fully_visible:
@@ -780,397 +1617,1646 @@ def draw_boston_skyline(screen, scroll_offset, distance):
     else:
         parallax_offset = 0
 
-    # Define Boston-inspired buildings
-    buildings = [
-        # Hancock Tower (tallest)
-        {'x': 100, 'w': 60, 'h': 200, 'color': (70, 90, 120), 'windows': True},
-        # Prudential Tower
-        {'x': 180, 'w': 50, 'h': 180, 'color': (80, 100, 130), 'windows': True},
-        # Small building
-        {'x': 240, 'w': 35, 'h': 100, 'color': (90, 110, 140), 'windows': True},
-        # Custom House Tower (with spire)
-        {'x': 290, 'w': 40, 'h': 140, 'color': (75, 95, 125), 'windows': True, 'spire': True},
-        # Medium building
-        {'x': 340, 'w': 45, 'h': 120, 'color': (85, 105, 135), 'windows': True},
-        # State Street building
-        {'x': 395, 'w': 55, 'h': 160, 'color': (65, 85, 115), 'windows': True},
-        # Small building
-        {'x': 460, 'w': 30, 'h': 90, 'color': (95, 115, 145), 'windows': True},
-        # Federal Reserve
-        {'x': 500, 'w': 50, 'h': 130, 'color': (70, 90, 120), 'windows': True},
-        # Wide building
-        {'x': 560, 'w': 65, 'h': 110, 'color': (80, 100, 130), 'windows': True},
-        # Tall narrow
-        {'x': 635, 'w': 35, 'h': 170, 'color': (75, 95, 125), 'windows': True},
-        # Medium
-        {'x': 680, 'w': 40, 'h': 125, 'color': (85, 105, 135), 'windows': True},
-        # Short wide
-        {'x': 730, 'w': 50, 'h': 95, 'color': (90, 110, 140), 'windows': True},
-    ]
-
-    # Draw buildings with slide-in effect from the right
-    for offset in [-WIDTH, 0, WIDTH]:
-        for building in buildings:
-            # Apply parallax scrolling and slide-in offset
-            x = building['x'] - parallax_offset + offset + base_slide_offset
-
-            # Only draw if visible on screen
-            if x < -building['w'] or x > WIDTH + building['w']:
-                continue
+    strip = skyline_strip()
+
+    # Start from the left-most period that still reaches onto the screen
+    x = base_slide_offset - parallax_offset - WIDTH
+    while x + WIDTH <= 0:
+        x += WIDTH
+    if x < WIDTH:
+        screen.blit(strip, (math.floor(x), GROUND_Y - strip.get_height()))
+
+
+def biome_for(distance):
+    """Which stretch of the run a distance falls in, for profiling"""
+    if distance < SUNSET_START:
+        return 'day'
+    if distance < SUNSET_END:
+        return 'sunset'
+    return 'skyline'
+
+
+class NullProfiler:
+    """Stand-in used when nothing is measuring the frame"""
+
+    def begin_frame(self):
+        pass
+
+    def lap(self, phase):
+        pass
+
+    def end_frame(self, distance):
+        pass
+
+
+class FrameProfiler:
+    """Times each phase of a frame and keeps rolling statistics.
+
+    Call begin_frame() at the top of the frame, lap(phase) after each phase
+    (it charges the time since the previous lap to that phase) and
+    end_frame() once the frame is presented. With record=True every frame
+    is kept for write_csv().
+    """
+
+    def __init__(self, window=120, record=False):
+        self.window = window
+        self.record = record
+        self.visible = False
+        self.phases = []
+        self.current = {}
+        self.history = deque(maxlen=window)
+        self.frame_times = deque(maxlen=window)
+        self.samples = []
+        self.frame = 0
+        self.frame_start = None
+        self.last = None
+        self.overlay = None  # Translucent panel background, reused while its size holds
+
+    def begin_frame(self):
+        now = time.perf_counter()
+        if self.frame_start is not None:
+            frame_ms = (now - self.frame_start) * 1000
+            self.frame_times.append(frame_ms)
+            if self.record and self.samples:
+                self.samples[-1]['frame_ms'] = frame_ms
+        self.frame_start = self.last = now
+        self.current = {}
+
+    def lap(self, phase):
+        now = time.perf_counter()
+        if phase not in self.current:
+            self.current[phase] = 0.0
+            if phase not in self.phases:
+                self.phases.append(phase)
+        self.current[phase] += (now - self.last) * 1000
+        self.last = now
+
+    def end_frame(self, distance):
+        self.frame += 1
+        work_ms = sum(self.current.values())
+        self.history.append((self.current, work_ms))
+        if self.record:
+            self.samples.append({
+                'frame': self.frame,
+                'biome': biome_for(distance),
+                'distance': distance,
+                'work_ms': work_ms,
+                'frame_ms': '',
+                **self.current,
+            })
 
-            y = skyline_y - building['h']
+    def averages(self):
+        """Mean milliseconds per phase over the rolling window"""
+        totals = dict.fromkeys(self.phases, 0.0)
+        for phases, _ in self.history:
+            for phase, ms in phases.items():
+                totals[phase] += ms
+        count = max(len(self.history), 1)
+        return {phase: total / count for phase, total in totals.items()}
+
+    def percentile(self, p):
+        """Frame work time (ms) at percentile p over the rolling window"""
+        work = sorted(work_ms for _, work_ms in self.history)
+        if not work:
+            return 0.0
+        return work[min(len(work) - 1, int(len(work) * p / 100))]
+
+    def draw(self, screen, font):
+        """Draw the per-phase table and the frame-time graph, returning the panel rect"""
+        averages = self.averages()
+        graph_height = 60
+        line_height = 16
+        panel = pygame.Rect(10, 120, 260, (len(averages) + 3) * line_height + graph_height + 20)
+
+        if self.overlay is None or self.overlay.get_size() != panel.size:
+            self.overlay = pygame.Surface(panel.size, pygame.SRCALPHA)
+            self.overlay.fill((0, 0, 0, 170))
+        screen.blit(self.overlay, panel)
+
+        work = [work_ms for _, work_ms in self.history]
+        mean_work = sum(work) / max(len(work), 1)
+        mean_frame = sum(self.frame_times) / max(len(self.frame_times), 1)
+        lines = [
+            f'frame {mean_frame:5.2f}  work {mean_work:5.2f} ms',
+            f'p95 {self.percentile(95):5.2f}  p99 {self.percentile(99):5.2f} ms',
+        ]
+        lines += [f'{phase:<20}{ms:6.2f}' for phase, ms in averages.items()]
+
+        y = panel.y + 6
+        for line in lines:
+            screen.blit(font.render(line, True, WHITE), (panel.x + 8, y))
+            y += line_height
+
+        # Frame-time graph, 33 ms full scale, with a line at the 60 FPS budget
+        graph = pygame.Rect(panel.x + 8, y + 6, panel.width - 16, graph_height)
+        budget_y = graph.bottom - graph.height * (1000 / FPS) / 33.3
+        screen.line((0, 200, 0), (graph.left, budget_y), (graph.right, budget_y))
+        bar_width = graph.width / self.window
+        for i, ms in enumerate(self.frame_times):
+            bar_height = min(graph.height, graph.height * ms / 33.3)
+            color = (255, 80, 80) if ms > 1000 / FPS * 1.5 else (220, 220, 220)
+            screen.rect(color, (graph.left + i * bar_width, graph.bottom - bar_height,
+                                max(1, bar_width), bar_height))
+        return panel
+
+    def write_csv(self, path):
+        fields = ['frame', 'biome', 'distance', 'work_ms', 'frame_ms'] + self.phases
+        with open(path, 'w', newline='') as f:
+            writer = csv.DictWriter(f, fieldnames=fields, restval=0.0)
+            writer.writeheader()
+            writer.writerows(self.samples)
+
+
+def entity_left(entity):
+    return entity.x
+
+
+def enemy_right(enemy):
+    return enemy.x + enemy.width
+
+
+def item_right(item):
+    return item.x + item.size
+
+
+def x_overlapping(entities, rect, right_edge):
+    """Broadphase: the slice of x-sorted entities whose x span overlaps rect.
+
+    right_edge gives an entity's right edge; within one kind every entity has
+    the same width, so right edges are sorted too.
+    """
+    start = bisect.bisect_right(entities, rect.left, key=right_edge)
+    end = bisect.bisect_left(entities, rect.right, lo=start, key=entity_left)
+    return entities[start:end]
+
+
+def drop_left_of(entities, x, pool=None):
+    """Remove entities from the front of an x-sorted list while they are left of x,
+    handing them back to pool for reuse"""
+    count = bisect.bisect_left(entities, x, key=entity_left)
+    if count:
+        if pool is not None:
+            pool.free.extend(entities[:count])
+        del entities[:count]
+
+
+class EntityPool:
+    """Free list of entities of one class, so spawning reuses scrolled-off objects.
+
+    acquire() re-runs __init__ on a released entity, which resets every slot,
+    and only constructs a new one when the free list is empty.
+    """
+
+    def __init__(self, cls):
+        self.cls = cls
+        self.free = []
+
+    def acquire(self, *args):
+        if self.free:
+            entity = self.free.pop()
+            entity.__init__(*args)
+            return entity
+        return self.cls(*args)
+
+    def release(self, entity):
+        self.free.append(entity)
+
+
+def draw_ground(screen):
+    screen.rect(GROUND_COLOR, (0, GROUND_Y, WIDTH, HEIGHT - GROUND_Y))
+    screen.line((80, 160, 80), (0, GROUND_Y), (WIDTH, GROUND_Y), 3)
+
+
+class DirtyRectRenderer:
+    """Presents frames with display.update(rects) while the background is static.
+
+    Before the sunset starts the sky and ground never change, so they are
+    kept in a background surface. Each frame restores the background only
+    where sprites were last frame, redraws the sun and sprites, and updates
+    the union of last frame's and this frame's rects. Once the sky starts
+    changing it falls back to a full redraw and flip.
+    """
+
+    def __init__(self, screen):
+        self.screen = screen  # A SurfaceBackend; update(rects) needs the display surface
+        self.background = SurfaceBackend(pygame.Surface(screen.get_size()))
+        self.background_valid = False
+        self.previous = []
+
+    def draw_world(self, game, alpha=1.0):
+        """Draw the world for this frame and return this frame's rects (None if full)"""
+        screen = self.screen
+        if game.distance >= SUNSET_START:
+            self.background_valid = False
+            self.previous = []
+            game.draw(screen, alpha)
+            return None
 
-            # Draw building body
-            pygame.draw.rect(screen, building['color'],
-                             (x, y, building['w'], building['h']))
+        if not self.background_valid:
+            game.draw_background(self.background, with_sun=False)
+            screen.blit(self.background.surface, (0, 0))
+            self.background_valid = True
+            self.previous = [screen.get_rect()]
+        else:
+            for rect in self.previous:
+                screen.blit(self.background.surface, rect, rect)
+
+        # The sun moves a fraction of a pixel per frame, so it's drawn like a sprite,
+        # clipped so it stays behind the ground and its 3px top line
+        sky_rect = pygame.Rect(0, 0, WIDTH, GROUND_Y - 1)
+        screen.set_clip(sky_rect)
+        sun_rect = draw_sun(screen, game.view(alpha)[1])
+        screen.set_clip(None)
+        game.profiler.lap('draw_sun')
 
-            # Draw darker outline
-            pygame.draw.rect(screen, (50, 60, 80),
-                             (x, y, building['w'], building['h']), 2)
+        rects = game.draw_sprites(screen, alpha)
+        if sun_rect:
+            rects.append(sun_rect.clip(sky_rect))
+        return rects
 
-            # Draw windows if specified
-            if building.get('windows'):
-                window_color = (200, 220, 255, 100)
-                window_w = 4
-                window_h = 6
-                spacing_x = 8
-                spacing_y = 10
-
-                for wy in range(int(y + 10), int(y + building['h'] - 5), spacing_y):
-                    for wx in range(int(x + 6), int(x + building['w'] - 6), spacing_x):
-                        # Random lit windows
-                        if random.random() > 0.3:
-                            pygame.draw.rect(screen, window_color,
-                                             (wx, wy, window_w, window_h))
+    def present(self, rects):
+        """Show the frame; rects are everything drawn this frame (None if full)"""
+        if rects is None:
+            self.screen.present()
+            return
+        self.screen.present(self.previous + rects)
+        self.previous = rects
+
+
+# Placement kinds in a level chunk
+PLACE_ENEMY = 0
+PLACE_COIN = 1
+PLACE_POWERUP = 2
+PLACE_DASH_POWERUP = 3
+
+
+def generate_chunks(rng):
+    """Endless level as a lazy stream of chunks, each CHUNK_WIDTH of world x wide.
+
+    A chunk is a tuple of (x, order, kind, y) placements; order makes equal
+    x sort in placement order. Enemies are laid out one chunk further ahead
+    than items, so powerups can be kept clear of an enemy in the next chunk.
+    """
+    def spacing(frames):
+        return rng.randint(*frames) * SCROLL_SPEED
+
+    first_x = WIDTH + 50
+    next_enemy = first_x + spacing(ENEMY_SPAWN_FRAMES)
+    next_coin = first_x + spacing(COIN_SPAWN_FRAMES)
+    next_powerup = first_x + spacing(POWERUP_SPAWN_FRAMES)
+    next_dash_powerup = first_x + spacing(DASH_POWERUP_SPAWN_FRAMES)
+    enemies = deque()  # Enemy x positions from this chunk through the next
+    order = 0
+    start = 0
+
+    def clear_of_enemies(x):
+        for enemy_x in enemies:
+            if enemy_x - ITEM_CLEARANCE <= x < enemy_x + ENEMY_WIDTH + ITEM_CLEARANCE:
+                x = enemy_x + ENEMY_WIDTH + ITEM_CLEARANCE
+        return x
+
+    while True:
+        end = start + CHUNK_WIDTH
+        placements = []
+
+        while next_enemy < end + CHUNK_WIDTH:
+            enemies.append(next_enemy)
+            next_enemy += spacing(ENEMY_SPAWN_FRAMES)
+        for enemy_x in enemies:
+            if enemy_x >= end:
+                break
+            placements.append((enemy_x, PLACE_ENEMY, None))
+
+        while next_coin < end:
+            coin_y = rng.choice([GROUND_Y - 80, GROUND_Y - 150, GROUND_Y - 220])
+            length = rng.randint(*COIN_ROW_LENGTH)
+            for i in range(length):
+                placements.append((next_coin + i * COIN_ROW_SPACING, PLACE_COIN, coin_y))
+            next_coin += (length - 1) * COIN_ROW_SPACING + spacing(COIN_SPAWN_FRAMES)
+
+        while next_powerup < end:
+            powerup_y = rng.choice([GROUND_Y - 100, GROUND_Y - 180])
+            next_powerup = clear_of_enemies(next_powerup)
+            placements.append((next_powerup, PLACE_POWERUP, powerup_y))
+            next_powerup += spacing(POWERUP_SPAWN_FRAMES)
+
+        while next_dash_powerup < end:
+            dash_powerup_y = rng.choice([GROUND_Y - 100, GROUND_Y - 180])
+            next_dash_powerup = clear_of_enemies(next_dash_powerup)
+            placements.append((next_dash_powerup, PLACE_DASH_POWERUP, dash_powerup_y))
+            next_dash_powerup += spacing(DASH_POWERUP_SPAWN_FRAMES)
+
+        chunk = []
+        for x, kind, y in sorted(placements, key=lambda placement: placement[0]):
+            chunk.append((x, order, kind, y))
+            order += 1
+        yield tuple(chunk)
+
+        while enemies and enemies[0] < end:
+            enemies.popleft()
+        start = end
+
+
+class Level:
+    """The chunks of one seed's level, generated on demand and kept for reuse"""
+
+    def __init__(self, seed):
+        self.seed = seed
+        self.chunks = []
+        self.source = generate_chunks(random.Random(seed))
+
+    def chunk(self, index):
+        chunks = self.chunks
+        while len(chunks) <= index:
+            chunks.append(next(self.source))
+        return chunks[index]
+
+
+_levels = OrderedDict()
+
+
+def level_for(seed):
+    """Cached Level for seed, so replays and benchmarks rerunning a seed skip generation"""
+    level = _levels.get(seed)
+    if level is None:
+        level = _levels[seed] = Level(seed)
+        if len(_levels) > LEVEL_CACHE_SIZE:
+            _levels.popitem(last=False)
+    else:
+        _levels.move_to_end(seed)
+    return level
+
+
+class Game:
+    """All simulation state for one run, advanced one frame at a time by step().
+
+    Nothing here touches the display, so a Game can be stepped headless as fast
+    as the CPU allows. Animation timing comes from the frame counter rather than
+    the wall clock, which keeps runs at any speed identical.
+
+    Gameplay draws from rng, effects updated with the simulation from
+    effects_rng and effects picked while drawing from draw_rng. All three are
+    reseeded from seed at every reset, so drawing more, less or not at all
+    never changes what spawns, and the same seed always plays the same runs.
+    """
+
+    def __init__(self, profiler=None, seed=None):
+        # Phase timings go to the profiler; the default one discards them
+        self.profiler = profiler if profiler is not None else NullProfiler()
+        self.seeds = random.Random(seed)
+
+        # Entities are recycled through these pools across frames and runs
+        self.enemy_pool = EntityPool(Enemy)
+        self.coin_pool = EntityPool(Coin)
+        self.powerup_pool = EntityPool(PowerUp)
+        self.dash_powerup_pool = EntityPool(DashPowerUp)
+        self.enemies = []
+        self.coins = []
+        self.powerups = []
+        self.dash_powerups = []
+        # Indexed by placement kind
+        self.spawners = (self.spawn_enemy, self.spawn_coin, self.spawn_powerup, self.spawn_dash_powerup)
+        self.reset()
+
+    def reset(self):
+        # Fresh streams for each run, still determined by the game's seed
+        self.rng = random.Random(self.seeds.getrandbits(64))
+        self.effects_rng = random.Random(self.seeds.getrandbits(64))
+        self.draw_rng = random.Random(self.seeds.getrandbits(64))
+
+        self.scheduler = Scheduler()
+        self.particles = ParticleSystem(rng=self.effects_rng)
+        self.player = Player(self.particles, self.effects_rng, self.scheduler)
+        self.golf_cart = GolfCart(self.effects_rng, self.draw_rng)
+        for entities, pool in ((self.enemies, self.enemy_pool), (self.coins, self.coin_pool),
+                               (self.powerups, self.powerup_pool),
+                               (self.dash_powerups, self.dash_powerup_pool)):
+            pool.free.extend(entities)
+            entities.clear()
+
+        # The level is laid out ahead in chunks; placements wait in pending, a heap
+        # ordered by x, until the right edge of the screen reaches them
+        self.level = level_for(self.rng.getrandbits(64))
+        self.next_chunk = 0
+        self.pending = []
+
+        self.distance = 0
+        self.camera_x = 0  # World x of the left edge of the screen
+        self.previous = self.view()  # State before the last step, for interpolation
+
+        self.frame = 0
+        self.ticks = 0  # Milliseconds of game time, derived from frame
+        self.game_over = False
+        self.death_cause = None  # 'ground collision' or 'airborne collision' once game_over
+
+        # Pickups and stomps this run, for balancing statistics
+        self.counts = dict.fromkeys(('stomps', 'coins', 'powerups', 'dash_powerups'), 0)
+
+    def handle_key(self, key):
+        """Apply a KEYDOWN for the given pygame key constant"""
+        if key == pygame.K_SPACE and not self.game_over:
+            self.player.jump()
+        if key == pygame.K_d and not self.game_over:
+            self.player.start_dash()
+        if key == pygame.K_r and self.game_over:
+            self.reset()
+
+    def view(self, alpha=1.0):
+        """Camera x, distance and player x, y, alpha of the way from the previous step to this one"""
+        player = self.player
+        current = (self.camera_x, self.distance, player.x, player.y)
+        if alpha >= 1.0:
+            return current
+        return tuple(before + (after - before) * alpha for before, after in zip(self.previous, current))
+
+    def step(self):
+        """Advance the simulation by one frame"""
+        self.previous = self.view()
+        self.frame += 1
+        self.ticks = self.frame * 1000 // FPS
+
+        if self.game_over:
+            return
 
-            # Draw spire for Custom House Tower
-            if building.get('spire'):
-                spire_w = 12
-                spire_h = 30
-                spire_x = x + building['w'] // 2 - spire_w // 2
-                spire_y = y - spire_h
-                pygame.draw.polygon(screen, (100, 120, 150), [
-                    (spire_x + spire_w // 2, spire_y),
-                    (spire_x, spire_y + spire_h),
-                    (spire_x + spire_w, spire_y + spire_h)
-                ])
+        player = self.player
+        profiler = self.profiler
+
+        # Store previous player x position
+        prev_player_x = player.x
+
+        player.update(self.ticks)
+        self.distance += SCROLL_SPEED
+
+        # If player moved forward from dash, move player back to normal position
+        # and advance the camera instead to create illusion of forward movement
+        if player.is_dashing:
+            player.x = prev_player_x
+            self.camera_x += player.dash_speed_boost
+
+        self.golf_cart.update(player.x, self.ticks)
+        profiler.lap('player.update')
+
+        # Expire powerups, dashes and cooldowns, then spawn what the screen edge reached
+        self.scheduler.tick()
+        self.stream_level()
+        profiler.lap('spawning')
+
+        # Scroll the world
+        self.camera_x += SCROLL_SPEED
+
+        self.update_entities()
+
+    def stream_level(self):
+        """Queue chunks up to LOOKAHEAD_CHUNKS past the right edge of the screen
+        and spawn every placement the edge has reached"""
+        edge = self.camera_x + WIDTH + 50
+        pending = self.pending
+        while self.next_chunk * CHUNK_WIDTH < edge + LOOKAHEAD_CHUNKS * CHUNK_WIDTH:
+            for placement in self.level.chunk(self.next_chunk):
+                heapq.heappush(pending, placement)
+            self.next_chunk += 1
+
+        while pending and pending[0][0] <= edge:
+            x, _, kind, y = heapq.heappop(pending)
+            self.spawners[kind](x, y)
+
+    def prefetch_chunks(self, count=LOOKAHEAD_CHUNKS):
+        """Generate chunks past the lookahead ahead of time, for otherwise idle frame time"""
+        self.level.chunk(self.next_chunk + count - 1)
+
+    def spawn_enemy(self, x, y):
+        self.enemies.append(self.enemy_pool.acquire(x, self.rng))
+
+    def spawn_coin(self, x, y):
+        self.coins.append(self.coin_pool.acquire(x, y))
+
+    def spawn_powerup(self, x, y):
+        self.powerups.append(self.powerup_pool.acquire(x, y))
+
+    def spawn_dash_powerup(self, x, y):
+        self.dash_powerups.append(self.dash_powerup_pool.acquire(x, y))
+
+    def update_entities(self):
+        player = self.player
+        ticks = self.ticks
+        profiler = self.profiler
+
+        # Entities spawn in order at the right edge and never move in world x, so
+        # each list stays sorted by x and off-screen entities are always at the front
+        camera_x = self.camera_x
+
+        # Entity rects are in world coordinates; the player lives in screen space
+        player_rect = player.get_rect().move(camera_x, 0)
+
+        for enemy in self.enemies:
+            enemy.update()
+        drop_left_of(self.enemies, camera_x - 100, self.enemy_pool)
+        profiler.lap('enemies update')
+
+        for enemy in x_overlapping(self.enemies, player_rect, enemy_right):
+            if enemy.alive and player_rect.colliderect(enemy.get_rect()):
+                # If dashing, phase through enemy
+                if player.is_dashing:
+                    continue
+                # If jumping on enemy
+                if player.vel_y > 0 and player.y < enemy.y - 10:
+                    enemy.alive = False
+                    player.vel_y = JUMP_FORCE * 0.7
+                    player.score += 100
+                    self.counts['stomps'] += 1
+                    self.particles.burst(enemy.x - camera_x + 20, enemy.y + 20, ENEMY_COLOR)
+                    player.target_squash = 1.4
+                    player.target_stretch = 0.6
+                else:
+                    self.game_over = True
+                    self.death_cause = 'ground collision' if player.on_ground else 'airborne collision'
+        profiler.lap('enemies collisions')
+
+        for coin in self.coins:
+            coin.update(ticks)
+        drop_left_of(self.coins, camera_x - 50, self.coin_pool)
+        profiler.lap('coins update')
+
+        for coin in x_overlapping(self.coins, player_rect, item_right):
+            if not coin.collected and player_rect.colliderect(coin.get_rect()):
+                coin.collected = True
+                player.score += 10
+                self.counts['coins'] += 1
+                self.particles.burst(coin.x - camera_x, coin.y, COIN_COLOR)
+                self.coins.remove(coin)
+                self.coin_pool.release(coin)
+        profiler.lap('coins collisions')
+
+        for powerup in self.powerups:
+            powerup.update(ticks)
+        drop_left_of(self.powerups, camera_x - 50, self.powerup_pool)
+        profiler.lap('powerups update')
+
+        for powerup in x_overlapping(self.powerups, player_rect, item_right):
+            if not powerup.collected and player_rect.colliderect(powerup.get_rect()):
+                powerup.collected = True
+                player.activate_powerup()
+                player.score += 50
+                self.counts['powerups'] += 1
+                self.particles.burst(powerup.x - camera_x, powerup.y, POWERUP_COLOR)
+                self.powerups.remove(powerup)
+                self.powerup_pool.release(powerup)
+        profiler.lap('powerups collisions')
+
+        for dash_powerup in self.dash_powerups:
+            dash_powerup.update(ticks)
+        drop_left_of(self.dash_powerups, camera_x - 50, self.dash_powerup_pool)
+        profiler.lap('dash_powerups update')
+
+        for dash_powerup in x_overlapping(self.dash_powerups, player_rect, item_right):
+            if not dash_powerup.collected and player_rect.colliderect(dash_powerup.get_rect()):
+                dash_powerup.collected = True
+                player.activate_dash()
+                player.score += 50
+                self.counts['dash_powerups'] += 1
+                self.particles.burst(dash_powerup.x - camera_x, dash_powerup.y, DASH_COLOR)
+                self.dash_powerups.remove(dash_powerup)
+                self.dash_powerup_pool.release(dash_powerup)
+        profiler.lap('dash_powerups collisions')
+
+        self.particles.update()
+        profiler.lap('particles')
+
+    def draw(self, screen, alpha=1.0):
+        """Draw the world (everything except the HUD), returning the sprite rects.
+
+        alpha is how far the frame falls between the previous step and the
+        current one; 1.0 draws the current step as is.
+        """
+        self.draw_background(screen, alpha=alpha)
+        return self.draw_sprites(screen, alpha)
+
+    def draw_background(self, screen, with_sun=True, alpha=1.0):
+        """Draw the sky, sun, skyline and ground"""
+        profiler = self.profiler
+        distance = self.view(alpha)[1]
 
-def main():
-    player = Player()
-    golf_cart = GolfCart()
-    enemies = []
-    coins = []
-    powerups = []
-    dash_powerups = []
-    particles = []
-
-    spawn_timer = 0
-    coin_timer = 0
-    powerup_timer = 0
-    dash_powerup_timer = 0
-    distance = 0
-    camera_offset = 0  # Track camera position for dash
-
-    font = pygame.font.Font(None, 36)
-    small_font = pygame.font.Font(None, 24)
-
-    running = True
-    game_over = False
-
-    while running:
-        dt = clock.tick(FPS)
-
-        for event in pygame.event.get():
-            if event.type == pygame.QUIT:
-                running = False
-            if event.type == pygame.KEYDOWN:
-                if event.key == pygame.K_SPACE and not game_over:
-                    player.jump()
-                if event.key == pygame.K_d and not game_over:
-                    player.start_dash()
-                if event.key == pygame.K_r and game_over:
-                    player = Player()
-                    golf_cart = GolfCart()
-                    enemies = []
-                    coins = []
-                    powerups = []
-                    dash_powerups = []
-                    particles = []
-                    spawn_timer = 0
-                    coin_timer = 0
-                    powerup_timer = 0
-                    dash_powerup_timer = 0
-                    distance = 0
-                    camera_offset = 0
-                    game_over = False
-
-        if not game_over:
-            # Store previous player x position
-            prev_player_x = player.x
-
-            player.update()
-            distance += SCROLL_SPEED
-
-            # If player moved forward from dash, adjust camera and world
-            if player.is_dashing:
-                dash_movement = player.x - prev_player_x - player.dash_speed_boost
-                camera_offset += dash_movement
-
-                # Move player back to normal position but shift everything else
-                player.x = prev_player_x
-
-                # Shift all world objects backward to create illusion of forward movement
-                for enemy in enemies:
-                    enemy.x -= player.dash_speed_boost
-                for coin in coins:
-                    coin.x -= player.dash_speed_boost
-                for powerup in powerups:
-                    powerup.x -= player.dash_speed_boost
-                for dash_powerup in dash_powerups:
-                    dash_powerup.x -= player.dash_speed_boost
-
-            golf_cart.update(player.x)
-
-            spawn_timer += 1
-            if spawn_timer > random.randint(60, 120):
-                enemies.append(Enemy(WIDTH + 50))
-                spawn_timer = 0
-
-            coin_timer += 1
-            if coin_timer > random.randint(40, 80):
-                coin_y = random.choice([GROUND_Y - 80, GROUND_Y - 150, GROUND_Y - 220])
-                coins.append(Coin(WIDTH + 50, coin_y))
-                coin_timer = 0
-
-            powerup_timer += 1
-            if powerup_timer > random.randint(300, 500):
-                powerup_y = random.choice([GROUND_Y - 100, GROUND_Y - 180])
-                powerups.append(PowerUp(WIDTH + 50, powerup_y))
-                powerup_timer = 0
-
-            dash_powerup_timer += 1
-            if dash_powerup_timer > random.randint(350, 550):
-                dash_powerup_y = random.choice([GROUND_Y - 100, GROUND_Y - 180])
-                dash_powerups.append(DashPowerUp(WIDTH + 50, dash_powerup_y))
-                dash_powerup_timer = 0
-
-            for enemy in enemies[:]:
-                enemy.update()
-                if enemy.x < -100:
-                    enemies.remove(enemy)
-
-                if enemy.alive and player.get_rect().colliderect(enemy.get_rect()):
-                    # If dashing, phase through enemy
-                    if player.is_dashing:
-                        continue
-                    # If jumping on enemy
-                    if player.vel_y > 0 and player.y < enemy.y - 10:
-                        enemy.alive = False
-                        player.vel_y = JUMP_FORCE * 0.7
-                        player.score += 100
-                        particles.append(ParticleEffect(enemy.x + 20, enemy.y + 20, ENEMY_COLOR))
-                        player.target_squash = 1.4
-                        player.target_stretch = 0.6
-                    else:
-                        game_over = True
-
-            for coin in coins[:]:
-                coin.update()
-                if coin.x < -50:
-                    coins.remove(coin)
-
-                if not coin.collected and player.get_rect().colliderect(coin.get_rect()):
-                    coin.collected = True
-                    player.score += 10
-                    particles.append(ParticleEffect(coin.x, coin.y, COIN_COLOR))
-                    coins.remove(coin)
-
-            for powerup in powerups[:]:
-                powerup.update()
-                if powerup.x < -50:
-                    powerups.remove(powerup)
-
-                if not powerup.collected and player.get_rect().colliderect(powerup.get_rect()):
-                    powerup.collected = True
-                    player.activate_powerup()
-                    player.score += 50
-                    particles.append(ParticleEffect(powerup.x, powerup.y, POWERUP_COLOR))
-                    powerups.remove(powerup)
-
-            for dash_powerup in dash_powerups[:]:
-                dash_powerup.update()
-                if dash_powerup.x < -50:
-                    dash_powerups.remove(dash_powerup)
-
-                if not dash_powerup.collected and player.get_rect().colliderect(dash_powerup.get_rect()):
-                    dash_powerup.collected = True
-                    player.activate_dash()
-                    player.score += 50
-                    particles.append(ParticleEffect(dash_powerup.x, dash_powerup.y, DASH_COLOR))
-                    dash_powerups.remove(dash_powerup)
-
-            for particle in particles[:]:
-                particle.update()
-                if particle.is_done():
-                    particles.remove(particle)
-
-        # Draw
         # Draw gradient sky based on distance
         draw_gradient_sky(screen, distance)
+        profiler.lap('draw_gradient_sky')
 
         # Draw sun (before buildings)
-        draw_sun(screen, distance)
+        if with_sun:
+            draw_sun(screen, distance)
+            profiler.lap('draw_sun')
 
         # Draw Boston skyline with slide-in effect
         draw_boston_skyline(screen, distance, distance)
+        profiler.lap('draw_boston_skyline')
 
-        pygame.draw.rect(screen, GROUND_COLOR, (0, GROUND_Y, WIDTH, HEIGHT - GROUND_Y))
-        pygame.draw.line(screen, (80, 160, 80), (0, GROUND_Y), (WIDTH, GROUND_Y), 3)
+        draw_ground(screen)
 
-        golf_cart.draw(screen)
+    def draw_sprites(self, screen, alpha=1.0):
+        """Draw everything that moves over the background and return the rects covered"""
+        profiler = self.profiler
+        dirty = [self.golf_cart.draw(screen)]
+        camera_x, _, player_x, player_y = self.view(alpha)
 
-        for coin in coins:
-            coin.draw(screen)
+        # Only entities overlapping the viewport get drawn
+        view = pygame.Rect(camera_x, 0, WIDTH, HEIGHT).inflate(DRAW_MARGIN * 2, 0)
 
-        for powerup in powerups:
-            powerup.draw(screen)
+        for coin in x_overlapping(self.coins, view, item_right):
+            dirty.append(coin.draw(screen, camera_x))
 
-        for dash_powerup in dash_powerups:
-            dash_powerup.draw(screen)
+        for powerup in x_overlapping(self.powerups, view, item_right):
+            dirty.append(powerup.draw(screen, camera_x))
 
-        for enemy in enemies:
-            enemy.draw(screen)
+        for dash_powerup in x_overlapping(self.dash_powerups, view, item_right):
+            dirty.append(dash_powerup.draw(screen, camera_x))
 
-        for particle in particles:
-            particle.draw(screen)
+        for enemy in x_overlapping(self.enemies, view, enemy_right):
+            dirty.append(enemy.draw(screen, camera_x))
+        profiler.lap('draw_entities')
 
-        player.draw(screen)
+        player = self.player
+        dirty += self.particles.draw(screen, player_x + player.width / 2, player_y + player.height / 2)
+        profiler.lap('draw_particles')
 
-        # UI
-        score_text = font.render(f'Score: {player.score}', True, BLACK)
-        screen.blit(score_text, (10, 10))
+        dirty.append(player.draw(screen, (player_x, player_y)))
+        profiler.lap('Player.draw')
 
-        distance_text = font.render(f'Distance: {distance // 10}m', True, BLACK)
-        screen.blit(distance_text, (10, 50))
+        return [rect for rect in dirty if rect]
 
-        jumps_text = small_font.render(f'Jumps: {"O " * player.jumps_left}', True, PLAYER_COLOR)
-        screen.blit(jumps_text, (10, 90))
 
-        # Powerup timers display
-        timer_y = 40
-        timer_spacing = 80
+def draw_triple_jump_icon(surface, center_x, center_y):
+    """Three small arrows pointing up"""
+    for i in range(3):
+        angle_offset = (i - 1) * 15
+        arrow_x = center_x + math.sin(math.radians(angle_offset)) * 5
+        arrow_base_y = center_y + 6
+        arrow_tip_y = center_y - 8
 
-        # Triple jump pie timer
-        if player.triple_jump_active:
-            pie_x = WIDTH - 80
-            pie_y = timer_y
-            pie_radius = 30
+        pygame.draw.line(surface, WHITE, (arrow_x, arrow_base_y), (arrow_x, arrow_tip_y), 2)
+        pygame.draw.polygon(surface, WHITE, [
+            (arrow_x, arrow_tip_y),
+            (arrow_x - 3, arrow_tip_y + 4),
+            (arrow_x + 3, arrow_tip_y + 4)
+        ])
 
-            pygame.draw.circle(screen, (50, 50, 50), (pie_x, pie_y), pie_radius + 3)
-            pygame.draw.circle(screen, (20, 20, 20), (pie_x, pie_y), pie_radius)
 
-            completion = player.triple_jump_duration / player.triple_jump_max_duration
-            end_angle = -90 + (360 * (1 - completion))
-
-            if completion > 0:
-                points = [(pie_x, pie_y)]
-                for angle in range(-90, int(end_angle) + 1, 5):
+def draw_dash_icon(surface, center_x, center_y):
+    """Small lightning bolt"""
+    bolt_points = [
+        (center_x - 2, center_y - 8),
+        (center_x + 2, center_y - 2),
+        (center_x - 1, center_y + 1),
+        (center_x + 4, center_y + 8),
+        (center_x + 1, center_y + 1),
+        (center_x + 2, center_y - 2),
+    ]
+    pygame.draw.polygon(surface, WHITE, bolt_points)
+
+
+class PieTimer:
+    """HUD countdown pie for one powerup, drawn from pre-rendered sprites.
+
+    The pie polygon only changes when its 5 degree outline gains a point, so
+    each step (backing circles, pie and icon) is rendered once on first use
+    and so is each radius of the pulsing ring. A frame is then two blits plus
+    the cached seconds text.
+    """
+
+    RADIUS = 30
+    STEP = 5  # Degrees between pie outline points
+    RING_WIDTH = 3
+
+    def __init__(self, color, draw_icon):
+        self.color = color
+        self.draw_icon = draw_icon
+        # Big enough for the backing circle and the ring at its largest pulse
+        self.center = self.RADIUS + 4
+        self.faces = {}
+        self.rings = {}
+
+    def face(self, points):
+        """Backing circles, the pie with this many outline points, and the icon"""
+        surface = self.faces.get(points)
+        if surface is None:
+            c = self.center
+            surface = pygame.Surface((c * 2 + 1, c * 2 + 1), pygame.SRCALPHA)
+            pygame.draw.circle(surface, (50, 50, 50), (c, c), self.RADIUS + 3)
+            pygame.draw.circle(surface, (20, 20, 20), (c, c), self.RADIUS)
+
+            if points:
+                polygon = [(c, c)]
+                for angle in range(-90, -90 + points * self.STEP, self.STEP):
                     rad = math.radians(angle)
-                    x = pie_x + math.cos(rad) * pie_radius
-                    y = pie_y + math.sin(rad) * pie_radius
-                    points.append((x, y))
-                points.append((pie_x, pie_y))
+                    polygon.append((c + math.cos(rad) * self.RADIUS, c + math.sin(rad) * self.RADIUS))
+                polygon.append((c, c))
+                pygame.draw.polygon(surface, self.color, polygon)
+
+            self.draw_icon(surface, c, c)
+            self.faces[points] = surface
+        return surface
+
+    def ring(self, radius):
+        surface = self.rings.get(radius)
+        if surface is None:
+            c = self.center
+            surface = pygame.Surface((c * 2 + 1, c * 2 + 1), pygame.SRCALPHA)
+            pygame.draw.circle(surface, self.color, (c, c), radius, self.RING_WIDTH)
+            self.rings[radius] = surface
+        return surface
 
-                if len(points) > 2:
-                    pygame.draw.polygon(screen, POWERUP_COLOR, points)
+    def draw(self, screen, center, remaining, total, ticks, font):
+        """Draw the timer centered at center and return the rects covered"""
+        pie_x, pie_y = center
+        completion = remaining / total
+        end_angle = -90 + (360 * (1 - completion))
+        points = len(range(-90, int(end_angle) + 1, self.STEP)) if completion > 0 else 0
+
+        topleft = (pie_x - self.center, pie_y - self.center)
+        dirty = screen.blit(self.face(points), topleft)
+
+        # The ring sits between the pie and the icon, which it never overlaps
+        pulse = 1.0 + math.sin(ticks * 0.02) * 0.1
+        screen.blit(self.ring(int(self.RADIUS * pulse)), topleft)
+
+        time_left = remaining // 60 + 1
+        time_text = text_cache.render(font, f'{time_left}s', WHITE)
+        text_rect = time_text.get_rect(center=(pie_x, pie_y + self.RADIUS + 15))
+        return [dirty, screen.blit(time_text, text_rect)]
+
+
+triple_jump_timer = PieTimer(POWERUP_COLOR, draw_triple_jump_icon)
+dash_timer = PieTimer(DASH_COLOR, draw_dash_icon)
+
+
+def draw_hud(screen, game, font, small_font):
+    """Draw score, distance, jumps, powerup timers and the game over banner.
+
+    Returns the rects drawn over.
+    """
+    player = game.player
+    dirty = []
+
+    dirty.append(text_cache.blit_number(screen, font, 'Score: ', player.score, BLACK, (10, 10)))
+
+    dirty.append(text_cache.blit_number(screen, font, 'Distance: ', game.distance // 10, BLACK, (10, 50),
+                                        suffix='m'))
+
+    jumps_text = text_cache.render(small_font, f'Jumps: {"O " * player.jumps_left}', PLAYER_COLOR)
+    dirty.append(screen.blit(jumps_text, (10, 90)))
+
+    # Powerup timers display
+    timer_x = WIDTH - 80
+    timer_y = 40
+    timer_spacing = 80
+
+    # Triple jump pie timer
+    if player.triple_jump_active:
+        dirty += triple_jump_timer.draw(screen, (timer_x, timer_y), player.triple_jump_duration,
+                                        player.triple_jump_max_duration, game.ticks, small_font)
+        timer_y += timer_spacing
+
+    # Dash pie timer
+    if player.dash_active:
+        dirty += dash_timer.draw(screen, (timer_x, timer_y), player.dash_duration,
+                                 player.dash_max_duration, game.ticks, small_font)
+
+        # Dash cooldown indicator
+        if player.dash_cooldown > 0:
+            cooldown_text = text_cache.render(small_font, f'CD: {player.dash_cooldown // 6 + 1}', (200, 200, 200))
+            cd_rect = cooldown_text.get_rect(center=(timer_x, timer_y - PieTimer.RADIUS - 15))
+            dirty.append(screen.blit(cooldown_text, cd_rect))
+
+    if game.game_over:
+        game_over_text = text_cache.render(font, 'GAME OVER! Press R to Restart', (255, 0, 0))
+        text_rect = game_over_text.get_rect(center=(WIDTH // 2, HEIGHT // 2))
+        dirty.append(screen.rect(WHITE, text_rect.inflate(20, 20)))
+        screen.blit(game_over_text, text_rect)
+
+    return dirty
+
+
+def autoplay_policy(game):
+    """Simple bot: jump over the nearest enemy, dash when possible, restart on death"""
+    player = game.player
+    if game.game_over:
+        return [pygame.K_r]
+
+    keys = []
+    for enemy in game.enemies:
+        gap = enemy.x - game.camera_x - (player.x + player.width)
+        if enemy.alive and 0 < gap < 60:
+            if player.on_ground:
+                keys.append(pygame.K_SPACE)
+            break
+    if player.dash_active and not player.is_dashing and player.dash_cooldown == 0:
+        keys.append(pygame.K_d)
+    return keys
+
+
+def idle_policy(game):
+    """Never press anything"""
+    return []
+
+
+POLICIES = {
+    'autoplay': autoplay_policy,
+    'idle': idle_policy,
+}
+
+
+def run_headless(frames, policy=idle_policy, seed=None):
+    """Run the simulation for a number of frames with no window and no frame cap.
+
+    policy is called once per frame with the Game and returns the pygame key
+    constants to press on that frame. Returns the Game and a stats dict.
+    """
+    game = Game(seed=seed)
+    deaths = 0
+    best_distance = 0
+    best_score = 0
+
+    for _ in range(frames):
+        was_over = game.game_over
+        for key in policy(game):
+            game.handle_key(key)
+        game.step()
+        if game.game_over and not was_over:
+            deaths += 1
+        best_distance = max(best_distance, game.distance)
+        best_score = max(best_score, game.player.score)
+
+    stats = {
+        'frames': frames,
+        'deaths': deaths,
+        'best_distance': best_distance,
+        'best_score': best_score,
+    }
+    return game, stats
+
+
+# Replays store each key as its index here, one byte per event
+REPLAY_KEYS = (pygame.K_SPACE, pygame.K_d, pygame.K_r)
+REPLAY_MAGIC = b'IRRP'
+REPLAY_VERSION = 4
+REPLAY_HEADER = struct.Struct('<4sBqI')  # magic, version, seed, steps
+REPLAY_EVENT = struct.Struct('<IB')  # step the key was pressed before, key index
+
+
+class Replay:
+    """The seed and every gameplay key press of a run, by simulation step.
+
+    Keys are stored against the number of steps that had run when they were
+    pressed, so playback applies them at the same point of the simulation no
+    matter how the recorded run's frames were timed.
+    """
+
+    def __init__(self, seed, steps=0, events=None):
+        self.seed = seed
+        self.steps = steps
+        self.events = events if events is not None else []
+
+    def record(self, step, key):
+        if key in REPLAY_KEYS:
+            self.events.append((step, key))
+
+    def keys_by_step(self):
+        keys = {}
+        for step, key in self.events:
+            keys.setdefault(step, []).append(key)
+        return keys
+
+    def save(self, path):
+        with open(path, 'wb') as f:
+            f.write(REPLAY_HEADER.pack(REPLAY_MAGIC, REPLAY_VERSION, self.seed, self.steps))
+            for step, key in self.events:
+                f.write(REPLAY_EVENT.pack(step, REPLAY_KEYS.index(key)))
+
+    @classmethod
+    def load(cls, path):
+        with open(path, 'rb') as f:
+            data = f.read()
+        magic, version, seed, steps = REPLAY_HEADER.unpack_from(data)
+        if magic != REPLAY_MAGIC or version != REPLAY_VERSION:
+            raise ValueError(f"{path} is not a version {REPLAY_VERSION} replay")
+        events = [(step, REPLAY_KEYS[key])
+                  for step, key in REPLAY_EVENT.iter_unpack(data[REPLAY_HEADER.size:])]
+        return cls(seed, steps, events)
+
+
+def state_hash(game):
+    """Short hex digest of everything that decides how the run plays out"""
+    player = game.player
+    digest = hashlib.blake2b(digest_size=8)
+    digest.update(struct.pack(
+        '<dddddiiiii??q', game.camera_x, game.distance, player.x, player.y, player.vel_y,
+        player.jumps_left, player.triple_jump_duration, player.dash_duration, player.dash_time,
+        player.dash_cooldown, player.is_dashing, game.game_over, player.score))
+    for enemy in game.enemies:
+        digest.update(struct.pack('<dd?i', enemy.x, enemy.y, enemy.alive, enemy.death_timer))
+    for items in (game.coins, game.powerups, game.dash_powerups):
+        digest.update(struct.pack('<i', len(items)))
+        for item in items:
+            digest.update(struct.pack('<dd?', item.x, item.y, item.collected))
+    return digest.hexdigest()
+
+
+def run_replay(replay, hash_file=None):
+    """Step a replay with no window and no frame cap, returning the Game and final hash.
+
+    With hash_file, one 'step hash' line is written per step, so two
+    playbacks can be compared with diff.
+    """
+    keys_by_step = replay.keys_by_step()
+    game = Game(seed=replay.seed)
+    digest = state_hash(game)
+
+    for step in range(replay.steps):
+        for key in keys_by_step.get(step, ()):
+            game.handle_key(key)
+        game.step()
+        if hash_file is not None:
+            digest = state_hash(game)
+            hash_file.write(f'{step} {digest}\n')
+    if hash_file is None:
+        digest = state_hash(game)
+    return game, digest
+
+
+# Split-process mode: the simulation steps in a child process and publishes a
+# snapshot of the state drawing reads into shared memory after every step
+SNAPSHOT_MAX_ENTITIES = 64  # Per entity kind; only entities in view are sent
+SNAPSHOT_MAX_PARTICLES = 1024
+SNAPSHOT_READ_ATTEMPTS = 3  # Copies tried before a torn read waits for the next frame
+SIMULATION_START_TIMEOUT = 10  # Seconds to wait for the first snapshot
+
+# (attribute, type) of the Game and Player state a frame is drawn from
+SNAPSHOT_GAME_FIELDS = (('frame', int), ('ticks', int), ('distance', int), ('camera_x', float),
+                        ('game_over', bool))
+SNAPSHOT_PLAYER_FIELDS = (
+    ('x', float), ('y', float), ('width', int), ('height', int), ('squash', float), ('stretch', float),
+    ('rotation', float), ('bounce_offset', float), ('is_dashing', bool), ('score', int), ('jumps_left', int),
+    ('triple_jump_active', bool), ('triple_jump_duration', int), ('triple_jump_max_duration', int),
+    ('dash_active', bool), ('dash_duration', int), ('dash_max_duration', int), ('dash_cooldown', int),
+)
+SNAPSHOT_CART_FIELDS = ('x', 'y', 'wheel_rotation', 'shake_offset', 'engine_rumble')
+# Entity lists sent slot by slot, with their right-edge functions for picking the ones in view
+SNAPSHOT_ENTITY_LISTS = (('enemies', Enemy, enemy_right), ('coins', Coin, item_right),
+                         ('powerups', PowerUp, item_right), ('dash_powerups', DashPowerUp, item_right))
+# Particle colors are sent as packed RGB instead of palette indices, which differ per process
+SNAPSHOT_PARTICLE_COLUMNS = ('x', 'y', 'angle', 'distance', 'life', 'max_life', 'size', 'kind')
+
+SNAPSHOT_HEADER = 1 + 4 + len(SNAPSHOT_GAME_FIELDS) + len(SNAPSHOT_PLAYER_FIELDS) + len(SNAPSHOT_CART_FIELDS)
+SNAPSHOT_LENGTH = (SNAPSHOT_HEADER
+                   + sum(1 + SNAPSHOT_MAX_ENTITIES * len(cls.__slots__) for _, cls, _ in SNAPSHOT_ENTITY_LISTS)
+                   + 1 + SNAPSHOT_MAX_PARTICLES * (len(SNAPSHOT_PARTICLE_COLUMNS) + 1))
+
+
+class SnapshotBuffer:
+    """Two game snapshots in shared memory, written by one process and read by another.
+
+    A snapshot is a flat float64 array: sequence number, previous view, Game,
+    Player and GolfCart fields, then per entity kind a count and one row of
+    slots per entity, then a count and one block per particle column. The
+    writer fills the buffer the reader isn't pointed at, then points the
+    reader at it. A buffer's sequence number is -1 while it is written, and
+    the reader keeps a copy only if the number is the same after copying.
+    """
+
+    def __init__(self, name=None):
+        self.shm = shared_memory.SharedMemory(name, create=name is None,
+                                              size=(1 + 2 * SNAPSHOT_LENGTH) * 8)
+        self.name = self.shm.name
+        data = np.ndarray(1 + 2 * SNAPSHOT_LENGTH, np.float64, self.shm.buf)
+        self.latest = data[:1]  # Index of the newest complete buffer
+        self.buffers = data[1:].reshape(2, SNAPSHOT_LENGTH)
+        self.sequence = 0  # Of the last snapshot published; zeroed memory reads as none yet
+
+    def publish(self, game):
+        index = 1 - int(self.latest[0])
+        out = self.buffers[index]
+        out[0] = -1
+
+        player = game.player
+        values = list(game.previous)
+        values += [getattr(game, name) for name, _ in SNAPSHOT_GAME_FIELDS]
+        values += [getattr(player, name) for name, _ in SNAPSHOT_PLAYER_FIELDS]
+        values += [getattr(game.golf_cart, name) for name in SNAPSHOT_CART_FIELDS]
+        out[1:SNAPSHOT_HEADER] = values
+        offset = SNAPSHOT_HEADER
+
+        # Everything the renderer could draw between the previous step and this one
+        previous_camera_x = game.previous[0]
+        view = pygame.Rect(previous_camera_x, 0, WIDTH + game.camera_x - previous_camera_x, HEIGHT)
+        view.inflate_ip(DRAW_MARGIN * 2, 0)
+        for name, cls, right_edge in SNAPSHOT_ENTITY_LISTS:
+            visible = x_overlapping(getattr(game, name), view, right_edge)[:SNAPSHOT_MAX_ENTITIES]
+            slots = cls.__slots__
+            row = [getattr(entity, slot) for entity in visible for slot in slots]
+            out[offset] = len(visible)
+            out[offset + 1:offset + 1 + len(row)] = row
+            offset += 1 + SNAPSHOT_MAX_ENTITIES * len(slots)
+
+        particles = game.particles
+        n = min(particles.count, SNAPSHOT_MAX_PARTICLES)
+        out[offset] = n
+        offset += 1
+        for name in SNAPSHOT_PARTICLE_COLUMNS:
+            out[offset:offset + n] = getattr(particles, name)[:n]
+            offset += SNAPSHOT_MAX_PARTICLES
+        packed = np.array([(r << 16) | (g << 8) | b for r, g, b in particles.palette] or [0])
+        out[offset:offset + n] = packed[particles.color[:n]]
+
+        self.sequence += 1
+        out[0] = self.sequence
+        self.latest[0] = index
+
+    def read(self, game):
+        """Copy the newest snapshot into game, a SnapshotGame; False if there was nothing new"""
+        for _ in range(SNAPSHOT_READ_ATTEMPTS):
+            buffer = self.buffers[int(self.latest[0])]
+            sequence = buffer[0]
+            if sequence == game.sequence:
+                return False
+            data = buffer.copy()
+            if sequence > 0 and buffer[0] == sequence:
+                break
+        else:
+            return False
+
+        game.sequence = sequence
+        header = data[:SNAPSHOT_HEADER].tolist()
+        game.previous = tuple(header[1:5])
+        offset = 5
+        for name, kind in SNAPSHOT_GAME_FIELDS:
+            setattr(game, name, kind(header[offset]))
+            offset += 1
+        for name, kind in SNAPSHOT_PLAYER_FIELDS:
+            setattr(game.player, name, kind(header[offset]))
+            offset += 1
+        for name in SNAPSHOT_CART_FIELDS:
+            setattr(game.golf_cart, name, header[offset])
+            offset += 1
+
+        for name, cls, _ in SNAPSHOT_ENTITY_LISTS:
+            slots = cls.__slots__
+            count = int(data[offset])
+            row = data[offset + 1:offset + 1 + count * len(slots)].tolist()
+            entities = getattr(game, name)
+            del entities[count:]
+            while len(entities) < count:
+                entities.append(cls.__new__(cls))
+            for i, entity in enumerate(entities):
+                for j, slot in enumerate(slots, i * len(slots)):
+                    setattr(entity, slot, row[j])
+            offset += 1 + SNAPSHOT_MAX_ENTITIES * len(slots)
+
+        particles = game.particles
+        n = int(data[offset])
+        offset += 1
+        while particles.capacity < n:
+            particles.grow()
+        for name in SNAPSHOT_PARTICLE_COLUMNS:
+            getattr(particles, name)[:n] = data[offset:offset + n]
+            offset += SNAPSHOT_MAX_PARTICLES
+        packed = data[offset:offset + n].astype(np.int64)
+        for code in np.unique(packed).tolist():
+            color = ((code >> 16) & 255, (code >> 8) & 255, code & 255)
+            particles.color[:n][packed == code] = particles.color_index(color)
+        particles.count = n
+        return True
+
+    def close(self):
+        # The arrays borrow the shared memory, so they go before it closes
+        del self.latest, self.buffers
+        self.shm.close()
+
+
+class SnapshotPlayer:
+    """The Player fields drawing reads, drawn with Player's own methods"""
+
+    draw = Player.draw
+    render_sprite = Player.render_sprite
+
+
+class SnapshotGame:
+    """The drawable side of a Game, filled in from a simulation process's snapshots.
+
+    It borrows Game's drawing methods, so draw(), draw_hud() and
+    DirtyRectRenderer draw it exactly as they would the Game it mirrors.
+    """
+
+    view = Game.view
+    draw = Game.draw
+    draw_background = Game.draw_background
+    draw_sprites = Game.draw_sprites
+
+    def __init__(self, profiler=None, draw_rng=None):
+        self.profiler = profiler if profiler is not None else NullProfiler()
+        self.sequence = 0  # Of the snapshot shown; fields are only valid once it's past 0
+        self.player = SnapshotPlayer()
+        # Cart rumble arrives in snapshots; only its exhaust smoke is drawn locally
+        self.golf_cart = GolfCart(smoke_rng=draw_rng if draw_rng is not None else random.Random())
+        self.particles = ParticleSystem()
+        self.enemies = []
+        self.coins = []
+        self.powerups = []
+        self.dash_powerups = []
+
+
+def simulation_worker(seed, buffer_name, keys, stop, record=None):
+    """Step a Game at FPS until stop is set, publishing a snapshot after each step.
+
+    Keys taken from the keys queue apply before the next step. With record,
+    the run is saved as a replay on the way out, as main() would save it.
+    """
+    buffer = SnapshotBuffer(buffer_name)
+    game = Game(seed=seed)
+    replay = Replay(seed) if record is not None else None
+    steps_run = 0
+    step_s = STEP_MS / 1000
+    next_step = time.perf_counter()
+
+    try:
+        while not stop.is_set():
+            now = time.perf_counter()
+            if now < next_step:
+                time.sleep(next_step - now)
+                continue
+            # As in main(), drop the backlog after a long stall rather than racing through it
+            if now - next_step > MAX_CATCHUP_STEPS * step_s:
+                next_step = now
+            next_step += step_s
+
+            while True:
+                try:
+                    key = keys.get_nowait()
+                except queue.Empty:
+                    break
+                if replay is not None:
+                    replay.record(steps_run, key)
+                game.handle_key(key)
+
+            game.step()
+            steps_run += 1
+            buffer.publish(game)
+            game.prefetch_chunks()
+    finally:
+        buffer.close()
+        if replay is not None:
+            replay.steps = steps_run
+            replay.save(record)
+
+
+class SimulationProcess:
+    """A simulation_worker process seen from the renderer.
+
+    Key presses go to it with send_key(); update() copies its newest
+    snapshot into game, a SnapshotGame, and returns how far between that
+    snapshot's previous and current step the frame should be drawn.
+    """
+
+    def __init__(self, seed=None, record=None, profiler=None):
+        # A fresh interpreter rather than a fork of one with a window open
+        context = multiprocessing.get_context('spawn')
+        self.buffer = SnapshotBuffer()
+        self.keys = context.Queue()
+        self.stop = context.Event()
+        self.game = SnapshotGame(profiler)
+        self.received = None  # When the newest snapshot was read
+        self.process = context.Process(target=simulation_worker, daemon=True,
+                                       args=(seed, self.buffer.name, self.keys, self.stop, record))
+        self.process.start()
+
+    def wait_ready(self, timeout=SIMULATION_START_TIMEOUT):
+        """Block until the first snapshot arrives"""
+        deadline = time.perf_counter() + timeout
+        while not self.buffer.read(self.game):
+            if not self.process.is_alive() or time.perf_counter() > deadline:
+                raise RuntimeError("simulation process did not start")
+            time.sleep(0.001)
+        self.received = time.perf_counter()
+
+    def send_key(self, key):
+        self.keys.put(key)
 
-            pulse = 1.0 + math.sin(pygame.time.get_ticks() * 0.02) * 0.1
-            ring_radius = int(pie_radius * pulse)
-            pygame.draw.circle(screen, POWERUP_COLOR, (pie_x, pie_y), ring_radius, 3)
+    def update(self):
+        now = time.perf_counter()
+        if self.buffer.read(self.game):
+            self.received = now
+        return min(1.0, (now - self.received) * 1000 / STEP_MS)
 
-            # Triple jump icon in center
-            for i in range(3):
-                angle_offset = (i - 1) * 15
-                arrow_x = pie_x + math.sin(math.radians(angle_offset)) * 5
-                arrow_base_y = pie_y + 6
-                arrow_tip_y = pie_y - 8
-
-                pygame.draw.line(screen, WHITE, (arrow_x, arrow_base_y), (arrow_x, arrow_tip_y), 2)
-                pygame.draw.polygon(screen, WHITE, [
-                    (arrow_x, arrow_tip_y),
-                    (arrow_x - 3, arrow_tip_y + 4),
-                    (arrow_x + 3, arrow_tip_y + 4)
-                ])
+    def close(self):
+        self.stop.set()
+        self.process.join(SIMULATION_START_TIMEOUT)
+        if self.process.is_alive():
+            self.process.terminate()
+        self.buffer.close()
+        self.buffer.shm.unlink()
 
-            time_left = player.triple_jump_duration // 60 + 1
-            time_text = small_font.render(f'{time_left}s', True, WHITE)
-            text_rect = time_text.get_rect(center=(pie_x, pie_y + pie_radius + 15))
-            screen.blit(time_text, text_rect)
 
-            timer_y += timer_spacing
+BACKENDS = ('surface', 'texture') if sdl2_video is not None else ('surface',)
 
-        # Dash pie timer
-        if player.dash_active:
-            pie_x = WIDTH - 80
-            pie_y = timer_y
-            pie_radius = 30
 
-            pygame.draw.circle(screen, (50, 50, 50), (pie_x, pie_y), pie_radius + 3)
-            pygame.draw.circle(screen, (20, 20, 20), (pie_x, pie_y), pie_radius)
+class StartupTrace:
+    """Wall time of each startup phase up to the first frames, for --startup-trace.
 
-            completion = player.dash_duration / player.dash_max_duration
-            end_angle = -90 + (360 * (1 - completion))
+    lap(phase) charges the time since the previous lap to phase, like
+    FrameProfiler.lap(). A trace filled in on another thread is attached
+    with add_background() and reported under the lap that waited for it.
+    """
 
-            if completion > 0:
-                points = [(pie_x, pie_y)]
-                for angle in range(-90, int(end_angle) + 1, 5):
-                    rad = math.radians(angle)
-                    x = pie_x + math.cos(rad) * pie_radius
-                    y = pie_y + math.sin(rad) * pie_radius
-                    points.append((x, y))
-                points.append((pie_x, pie_y))
-
-                if len(points) > 2:
-                    pygame.draw.polygon(screen, DASH_COLOR, points)
-
-            pulse = 1.0 + math.sin(pygame.time.get_ticks() * 0.02) * 0.1
-            ring_radius = int(pie_radius * pulse)
-            pygame.draw.circle(screen, DASH_COLOR, (pie_x, pie_y), ring_radius, 3)
-
-            # Lightning bolt icon in center
-            center_x = pie_x
-            center_y = pie_y
-            bolt_points = [
-                (center_x - 2, center_y - 8),
-                (center_x + 2, center_y - 2),
-                (center_x - 1, center_y + 1),
-                (center_x + 4, center_y + 8),
-                (center_x + 1, center_y + 1),
-                (center_x + 2, center_y - 2),
-            ]
-            pygame.draw.polygon(screen, WHITE, bolt_points)
-
-            time_left = player.dash_duration // 60 + 1
-            time_text = small_font.render(f'{time_left}s', True, WHITE)
-            text_rect = time_text.get_rect(center=(pie_x, pie_y + pie_radius + 15))
-            screen.blit(time_text, text_rect)
-
-            # Dash cooldown indicator
-            if player.dash_cooldown > 0:
-                cooldown_text = small_font.render(f'CD: {player.dash_cooldown // 6 + 1}', True, (200, 200, 200))
-                cd_rect = cooldown_text.get_rect(center=(pie_x, pie_y - pie_radius - 15))
-                screen.blit(cooldown_text, cd_rect)
-
-        if game_over:
-            game_over_text = font.render('GAME OVER! Press R to Restart', True, (255, 0, 0))
-            text_rect = game_over_text.get_rect(center=(WIDTH // 2, HEIGHT // 2))
-            pygame.draw.rect(screen, WHITE, text_rect.inflate(20, 20))
-            screen.blit(game_over_text, text_rect)
+    def __init__(self):
+        self.last = time.perf_counter()
+        self.phases = []
+        self.background = {}
+
+    def lap(self, phase):
+        now = time.perf_counter()
+        self.phases.append((phase, (now - self.last) * 1000))
+        self.last = now
+
+    def add_background(self, phase, trace):
+        self.background[phase] = trace
+
+    def report(self):
+        print("Startup trace (ms):")
+        print(f"  {'module import':<28}{(_import_finished - _import_started) * 1000:8.1f}")
+        total = 0.0
+        for phase, ms in self.phases:
+            total += ms
+            print(f"  {phase:<28}{ms:8.1f}  {total:8.1f}")
+            for background_phase, background_ms in getattr(self.background.get(phase), 'phases', ()):
+                print(f"    {background_phase:<26}{background_ms:8.1f}")
+
+
+def load_fonts():
+    """The HUD, small HUD and profiler fonts, starting the font subsystem if needed"""
+    pygame.font.init()
+    return (pygame.font.Font(None, 36), pygame.font.Font(None, 24),
+            pygame.font.SysFont('monospace', 13))
+
+
+def preload(trace):
+    """Load fonts and build the generated art play needs, recording laps in trace.
+
+    Runs on a worker thread while the first frame is on screen; the main
+    thread must not draw until it returns. Returns load_fonts().
+    """
+    fonts = load_fonts()
+    trace.lap('fonts')
+    # Every entity kind's atlas, whether or not the run opens with one on screen
+    for entity in (Enemy(0, random.Random(0)), Coin(0, 0), PowerUp(0, 0), DashPowerUp(0, 0),
+                   GolfCart(random.Random(0), random.Random(0))):
+        type(entity).atlas = entity.build_atlas()
+    # and the standing pose the player starts in
+    Player().draw(SurfaceBackend(pygame.Surface((WIDTH, HEIGHT))))
+    trace.lap('sprites')
+    get_sky_surface(1.0)
+    trace.lap('sunset sky')
+    skyline_strip()
+    trace.lap('skyline')
+    return fonts
+
+
+def surface_backend(window, render_size=None):
+    """A SurfaceBackend, or a ScaledSurfaceBackend when the frame isn't drawn at window size"""
+    size = (WIDTH, HEIGHT)
+    if window.get_size() == size and (render_size is None or tuple(render_size) == size):
+        return SurfaceBackend(window)
+    return ScaledSurfaceBackend(window, render_size or window.get_size())
+
+
+def create_backend(kind, title="Infinite Runner", render_size=None, window_size=(WIDTH, HEIGHT)):
+    """Open the game window drawn by the given backend.
+
+    Frames are drawn at render_size, by default the window size, and
+    stretched to fill the window.
+    """
+    pygame.display.init()
+    if kind == 'texture':
+        # Nothing is converted for a renderer; surfaces become textures as they are
+        window = sdl2_video.Window(title, window_size)
+        window.set_icon(assets.image('coin.png'))
+        return TextureBackend(window, render_size)
+    screen = pygame.display.set_mode(window_size)
+    pygame.display.set_caption(title)
+    # Loaded once the display exists, so the image atlas is converted to its format
+    pygame.display.set_icon(assets.image('coin.png'))
+    return surface_backend(screen, render_size)
+
+
+def fastest_backend(frames=BACKEND_CALIBRATION_FRAMES, render_size=None, window_size=(WIDTH, HEIGHT)):
+    """Draw the same stretch of a seeded run on each backend and return the quickest kind.
+
+    Each backend draws into a hidden window and presents every frame, so
+    both are timed getting frames on screen and nothing shows before the
+    real window opens.
+    """
+    pygame.display.init()
+    timings = {}
+    for kind in BACKENDS:
+        try:
+            if kind == 'texture':
+                window = sdl2_video.Window("calibration", window_size, hidden=True)
+                backend = TextureBackend(window, render_size)
+            else:
+                backend = surface_backend(pygame.display.set_mode(window_size, pygame.HIDDEN), render_size)
+        except pygame.error:
+            continue
+
+        game = Game(seed=0)
+        game.draw(backend)  # Builds atlases and uploads textures outside the timing
+        start = time.perf_counter()
+        for _ in range(frames):
+            game.step()
+            game.draw(backend)
+            backend.present()
+        timings[kind] = time.perf_counter() - start
+
+        if kind == 'texture':
+            window.destroy()
+    # Close the hidden display window; create_backend() opens the real one
+    pygame.display.quit()
+    return min(timings, key=timings.get)
+
+
+def cached_backend(cache_dir, render_size=None, window_size=(WIDTH, HEIGHT)):
+    """fastest_backend(), remembered in cache_dir so later launches with the same
+    pygame, video driver and sizes skip the calibration. With cache_dir None it
+    calibrates every time."""
+    pygame.display.init()
+    key = repr((pygame.version.ver, pygame.display.get_driver(), BACKENDS, render_size, tuple(window_size)))
+    path = None if cache_dir is None else os.path.join(cache_dir, 'backend.json')
+    if path is not None:
+        try:
+            with open(path) as f:
+                saved = json.load(f)
+            if saved['key'] == key and saved['backend'] in BACKENDS:
+                return saved['backend']
+        except (OSError, ValueError, KeyError, TypeError):
+            pass
+
+    kind = fastest_backend(render_size=render_size, window_size=window_size)
+    if path is not None:
+        # Best effort, written like the prebaked images
+        temp_path = f'{path[:-5]}.{os.getpid()}.json'
+        try:
+            os.makedirs(cache_dir, exist_ok=True)
+            with open(temp_path, 'w') as f:
+                json.dump({'key': key, 'backend': kind}, f)
+            os.replace(temp_path, path)
+        except OSError:
+            pass
+    return kind
+
+
+def main(show_profiler=False, profile_csv=None, dirty_rects=False, asset_cache=PREBAKE_CACHE_DIR,
+         max_fps=FPS, seed=None, record=None, backend='auto', render_size=None,
+         window_size=(WIDTH, HEIGHT), startup_trace=False, split_process=False):
+    trace = StartupTrace()
+    assets.cache_dir = asset_cache
+    if backend == 'auto':
+        backend = cached_backend(asset_cache, render_size, window_size)
+        trace.lap('backend calibration')
+    screen = create_backend(backend, render_size=render_size, window_size=window_size)
+    trace.lap('window')
+
+    # Show the empty scene right away and load the rest behind it
+    screen.fill(SKY_BLUE)
+    draw_ground(screen)
+    screen.present()
+    trace.lap('first frame')
+
+    # A recorded run needs a known seed to be replayed from
+    if seed is None and record is not None:
+        seed = random.randrange(2 ** 63)
+    replay = Replay(seed) if record is not None and not split_process else None
+    steps_run = 0
+
+    # F3 toggles the frame profiler overlay
+    profiler = FrameProfiler(record=profile_csv is not None)
+    profiler.visible = show_profiler
+    # Split, the simulation steps (and records) in its own process and this loop
+    # only draws the snapshots it publishes. It starts up alongside the preload
+    simulation = SimulationProcess(seed, record, profiler) if split_process else None
+
+    try:
+        preload_trace = StartupTrace()
+        executor = ThreadPoolExecutor(1)
+        preloaded = executor.submit(preload, preload_trace)
+        clock = pygame.time.Clock()
+
+        # Keep the window responsive until the preload is done. It fills the entity
+        # atlases, player sprite cache and sky images that drawing reads, so nothing
+        # is drawn until then
+        running = True
+        while not preloaded.done():
+            for event in pygame.event.get():
+                if event.type == pygame.QUIT:
+                    running = False
+            clock.tick(FPS)
+        font, small_font, profiler_font = preloaded.result()
+        executor.shutdown()
+        trace.lap('preload wait')
+        trace.add_background('preload wait', preload_trace)
+
+        if simulation is not None:
+            simulation.wait_ready()
+            game = simulation.game
+        else:
+            game = Game(profiler, seed)
+        # Partial updates only mean something when drawing straight into the display surface
+        renderer = DirtyRectRenderer(screen) if dirty_rects and isinstance(screen, SurfaceBackend) else None
+        trace.lap('game setup')
+
+        accumulator = 0.0  # Milliseconds of real time not yet simulated
+        first_frame = True
+
+        # Automatic collection is off while playing. Startup objects are frozen
+        # out of the collector's reach, and collections run at game over or,
+        # in a long run, once enough young objects have piled up
+        gc.collect()
+        gc.freeze()
+        gc.disable()
+
+        while running:
+            # The simulation runs in fixed FPS steps whatever the render rate; 0 renders uncapped
+            accumulator += clock.tick(max_fps)
+            profiler.begin_frame()
+
+            for event in pygame.event.get():
+                if event.type == pygame.QUIT:
+                    running = False
+                if event.type == pygame.KEYDOWN:
+                    if event.key == pygame.K_F3:
+                        profiler.visible = not profiler.visible
+                    if simulation is not None:
+                        simulation.send_key(event.key)
+                        continue
+                    if replay is not None:
+                        replay.record(steps_run, event.key)
+                    game.handle_key(event.key)
+            profiler.lap('events')
+
+            was_over = game.game_over
+            if simulation is not None:
+                alpha = simulation.update()
+                profiler.lap('snapshot')
+            else:
+                # Catch up on as many steps as have elapsed; after a long stall drop
+                # the backlog rather than spiralling further behind
+                steps = 0
+                while accumulator >= STEP_MS and steps < MAX_CATCHUP_STEPS:
+                    game.step()
+                    accumulator -= STEP_MS
+                    steps += 1
+                steps_run += steps
+                if accumulator >= STEP_MS:
+                    accumulator %= STEP_MS
+                alpha = accumulator / STEP_MS
+
+            if game.game_over and not was_over:
+                gc.collect()
+            elif gc.get_count()[0] > GC_YOUNG_LIMIT:
+                gc.collect(0)
+            profiler.lap('gc')
+
+            # Draw
+            if renderer:
+                dirty = renderer.draw_world(game, alpha)
+            else:
+                game.draw(screen, alpha)
+                dirty = None
+            hud_rects = draw_hud(screen, game, font, small_font)
+            profiler.lap('hud')
 
-        pygame.display.flip()
+            if profiler.visible:
+                hud_rects.append(profiler.draw(screen, profiler_font))
+                profiler.lap('profiler overlay')
+
+            if renderer:
+                renderer.present(None if dirty is None else dirty + hud_rects)
+            else:
+                screen.present()
+            profiler.lap('present')
+
+            # Lay out the level further ahead while waiting for the next frame
+            if simulation is None:
+                game.prefetch_chunks()
+                profiler.lap('level prefetch')
+            profiler.end_frame(game.distance)
+
+            if first_frame:
+                first_frame = False
+                trace.lap('first game frame')
+                if startup_trace:
+                    trace.report()
+
+    finally:
+        # Also on the way out of an exception, so nothing outlives the game and
+        # a run that crashed still leaves its timings and recording behind
+        if simulation is not None:
+            simulation.close()
+        gc.unfreeze()
+        gc.enable()
+        if profile_csv is not None:
+            profiler.write_csv(profile_csv)
+        if replay is not None:
+            replay.steps = steps_run
+            replay.save(record)
 
     pygame.quit()
 
 
+def parse_size(text):
+    """'WIDTHxHEIGHT' as a (width, height) tuple, for argparse"""
+    try:
+        width, height = (int(part) for part in text.lower().split('x'))
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"expected WIDTHxHEIGHT, got {text!r}")
+    if width <= 0 or height <= 0:
+        raise argparse.ArgumentTypeError(f"size must be positive, got {text!r}")
+    return width, height
+
+
+def parse_seed(text):
+    """An int seed that fits a replay header, for argparse"""
+    try:
+        seed = int(text)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"expected an integer, got {text!r}")
+    if not -2 ** 63 <= seed < 2 ** 63:
+        raise argparse.ArgumentTypeError(f"seed must fit in a signed 64-bit integer, got {text!r}")
+    return seed
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Infinite Runner")
+    parser.add_argument('--headless', action='store_true',
+                        help="run the simulation with no window and no frame cap")
+    parser.add_argument('--frames', type=int, default=FPS * 60 * 10,
+                        help="frames to simulate in headless mode (default: 10 minutes)")
+    parser.add_argument('--seed', type=parse_seed, default=None,
+                        help="random seed (recordings pick one when not given)")
+    parser.add_argument('--policy', choices=sorted(POLICIES), default='autoplay',
+                        help="scripted input source for headless mode")
+    parser.add_argument('--profile', action='store_true',
+                        help="show the frame profiler overlay at startup (toggle with F3)")
+    parser.add_argument('--startup-trace', action='store_true',
+                        help="print how long each startup phase took up to the first game frame")
+    parser.add_argument('--profile-csv', metavar='PATH',
+                        help="write per-frame phase timings to a CSV file on exit")
+    parser.add_argument('--dirty-rects', action='store_true',
+                        help="update only the changed parts of the screen while the sky is static")
+    parser.add_argument('--record', metavar='PATH',
+                        help="save the seed and key presses of the run as a replay on exit")
+    parser.add_argument('--replay', metavar='PATH',
+                        help="play a recorded run back with no window, as fast as possible")
+    parser.add_argument('--hashes', metavar='PATH',
+                        help="with --replay, write a state hash per step for diffing two runs")
+    parser.add_argument('--split-process', action='store_true',
+                        help="run the simulation in a second process so slow frames can't delay it")
+    parser.add_argument('--backend', choices=('auto',) + BACKENDS, default='auto',
+                        help="draw into the display surface or through the SDL2 texture renderer; "
+                             "auto times both on first launch and keeps the answer in the asset "
+                             "cache (default: %(default)s)")
+    parser.add_argument('--render-size', type=parse_size, metavar='WxH',
+                        help="resolution frames are drawn at before scaling to the window, "
+                             "e.g. 400x300 (default: the window size)")
+    parser.add_argument('--window-size', type=parse_size, metavar='WxH', default=(WIDTH, HEIGHT),
+                        help=f"window size; the game area is always laid out as {WIDTH}x{HEIGHT} "
+                             f"(default: {WIDTH}x{HEIGHT})")
+    parser.add_argument('--max-fps', type=int, default=FPS,
+                        help=f"render frame rate cap, 0 for uncapped; the simulation always "
+                             f"steps {FPS} times a second (default: %(default)s)")
+    parser.add_argument('--asset-cache', metavar='DIR', default=PREBAKE_CACHE_DIR,
+                        help="directory for prebaked sky and skyline images (default: %(default)s)")
+    parser.add_argument('--no-asset-cache', dest='asset_cache', action='store_const', const=None,
+                        help="always render procedural art at startup")
+    return parser.parse_args(argv)
+
+
 if __name__ == '__main__':
-    main()
\ No newline at end of file
+    args = parse_args()
+    if args.replay:
+        replay = Replay.load(args.replay)
+        start = time.perf_counter()
+        if args.hashes:
+            with open(args.hashes, 'w') as hash_file:
+                game, digest = run_replay(replay, hash_file)
+        else:
+            game, digest = run_replay(replay)
+        elapsed = time.perf_counter() - start
+        print(f"Replayed {replay.steps} steps ({len(replay.events)} key presses) in {elapsed:.2f}s")
+        print(f"Distance: {game.distance // 10}m  Score: {game.player.score}  Final state: {digest}")
+    elif args.headless:
+        start = time.perf_counter()
+        game, stats = run_headless(args.frames, POLICIES[args.policy], args.seed)
+        elapsed = time.perf_counter() - start
+        print(f"Simulated {stats['frames']} frames in {elapsed:.2f}s "
+              f"({stats['frames'] / max(elapsed, 1e-9):.0f} frames/s)")
+        print(f"Deaths: {stats['deaths']}  Best distance: {stats['best_distance'] // 10}m  "
+              f"Best score: {stats['best_score']}")
+    else:
+        main(args.profile, args.profile_csv, args.dirty_rects, args.asset_cache, args.max_fps,
+             args.seed, args.record, args.backend, args.render_size, args.window_size,
+             args.startup_trace, args.split_process)